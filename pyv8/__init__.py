@@ -15,6 +15,8 @@ _pyv8.init_v8(
         # "--initial-shared-heap-size=4024",
         # "--single-threaded",
         # "--allow-natives-syntax"
+        # 额外的v8参数可以通过环境变量传入，例如 PYV8_FLAGS="--max_old_space_size=4096"
+        *os.environ.get('PYV8_FLAGS', '').split(),
         ]
 )
 
@@ -35,6 +37,20 @@ v8_gc = _pyv8.v8_gc
 
 
 from .devtools import start_devtools
+from .pool import ContextPool
+from .convert import deep_convert, to_js, lazy, LazyObject
+from .trace import HookFilter, HookTracer, HookEvent
+from .process import ProcessPool, ProcessPoolError, WorkerCrashed
+from .aio import as_future, asyncio_loop_integration
+from .calls import call_many, call_many_iter, bind_method
+from .inspector import InspectorSession, InspectorError, heap_statistics
+from .profiler import (
+    HeapProfiler, AllocationNode, take_heap_snapshot, start_sampling_heap_profiler, stop_sampling_heap_profiler,
+    CpuProfiler, CpuProfile, start_cpu_profile, stop_cpu_profile,
+    Coverage, CoverageReport, ScriptCoverage, start_coverage, take_coverage,
+)
+from .inspector_server import DevToolsServer, DevToolsTarget
+from .interop import InteropStats, instrument, uninstrument, interop_stats, reset_interop_stats
 
 
 class ArrayType:
@@ -0,0 +1,119 @@
+import asyncio
+import itertools
+
+from . import _pyv8
+
+
+def as_future(promise, loop=None):
+    """
+    把JSPromise包装成asyncio.Future，可以直接await:
+        result = await pyv8.as_future(promise)
+
+    promise被reject时future抛出JSException
+    """
+    loop = loop or asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def on_fulfilled(value=None, *args):
+        if not future.done():
+            future.set_result(value)
+
+    def on_rejected(reason=None, *args):
+        if not future.done():
+            future.set_exception(_pyv8.JSException(str(reason)))
+
+    # promise已经settle时，then的回调会在本次调用结束后的microtask checkpoint中执行
+    promise.then(on_fulfilled, on_rejected)
+    return future
+
+
+class LoopIntegration:
+    """
+    在context中注册由asyncio事件循环驱动的setTimeout/setInterval/clearTimeout/clearInterval
+
+    context中的js代码只能在事件循环所在线程执行；
+    不在协程中创建时需要传入loop，否则抛出RuntimeError
+    """
+
+    def __init__(self, context, loop=None):
+        self.context = context
+        self.loop = loop or asyncio.get_running_loop()
+        self.timers = {}
+        self._ids = itertools.count(1)
+        self._idle = None
+        context.expose(
+            setTimeout=self.set_timeout,
+            setInterval=self.set_interval,
+            clearTimeout=self.clear_timer,
+            clearInterval=self.clear_timer,
+        )
+
+    @staticmethod
+    def _delay(delay):
+        try:
+            return max(float(delay), 0) / 1000
+        except (TypeError, ValueError):
+            return 0
+
+    def _schedule(self, timer_id, callback, delay, args, repeat):
+        self.timers[timer_id] = self.loop.call_later(
+            delay, self._fire, timer_id, callback, delay, args, repeat)
+
+    def _fire(self, timer_id, callback, delay, args, repeat):
+        if repeat:
+            self._schedule(timer_id, callback, delay, args, repeat)
+        else:
+            self.timers.pop(timer_id, None)
+        try:
+            if isinstance(callback, str):
+                self.context.exec_js(callback)
+            else:
+                callback(*args)
+        except Exception as e:
+            self.loop.call_exception_handler({
+                'message': f'exception in js timer {timer_id}',
+                'exception': e,
+            })
+        self._check_idle()
+
+    def set_timeout(self, callback, delay=0, *args):
+        timer_id = next(self._ids)
+        self._schedule(timer_id, callback, self._delay(delay), args, False)
+        return timer_id
+
+    def set_interval(self, callback, delay=0, *args):
+        timer_id = next(self._ids)
+        # 和浏览器一样，interval的最小间隔按1ms处理，避免空转
+        self._schedule(timer_id, callback, max(self._delay(delay), 0.001), args, True)
+        return timer_id
+
+    def clear_timer(self, timer_id=None, *args):
+        handle = self.timers.pop(timer_id, None)
+        if handle is not None:
+            handle.cancel()
+            self._check_idle()
+
+    def _check_idle(self):
+        if not self.timers and self._idle is not None and not self._idle.done():
+            self._idle.set_result(None)
+
+    def run_microtasks(self):
+        # 从python进入v8的调用返回时会执行microtask checkpoint，空脚本即可驱动microtask队列
+        self.context.exec_js("void 0")
+
+    async def until_idle(self):
+        """等待所有timer执行完毕(interval需要被clearInterval)"""
+        while self.timers:
+            self._idle = self.loop.create_future()
+            await self._idle
+        self._idle = None
+
+    def close(self):
+        for handle in self.timers.values():
+            handle.cancel()
+        self.timers.clear()
+        self._check_idle()
+
+
+def asyncio_loop_integration(context, loop=None):
+    return LoopIntegration(context, loop)
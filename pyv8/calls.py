@@ -0,0 +1,81 @@
+import json
+
+from . import _pyv8
+from .convert import _js_function
+
+# 在js侧循环调用，整批参数只跨越一次边界；结果全部是字符串/有限数字/布尔/null时
+# 以JSON字符串返回，python侧一次json.loads，避免逐个元素转换
+_CALL_MANY_JS = r"""
+(function (fn, receiver, argsList) {
+    var out = new Array(argsList.length), simple = true, v, t;
+    for (var i = 0; i < argsList.length; i++) {
+        v = out[i] = fn.apply(receiver, argsList[i]);
+        if (simple && v !== null) {
+            t = typeof v;
+            simple = t === 'string' || t === 'boolean' || (t === 'number' && isFinite(v));
+        }
+    }
+    return simple ? JSON.stringify(out) : out;
+})
+"""
+
+
+def _call_many_fn(context):
+    # 不通过func.constructor创建，补环境/反调试代码经常改写Function.prototype.constructor
+    if context is None:
+        context = _pyv8.current_context()
+        if context is None:
+            raise RuntimeError('call_many needs a context when no context is entered')
+    return _js_function(context, _CALL_MANY_JS)
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for args in iterable:
+        chunk.append(list(args) if isinstance(args, (tuple, list)) else [args])
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _results(batch):
+    if isinstance(batch, str):
+        return json.loads(batch)
+    return list(batch)
+
+
+def call_many_iter(func, iterable_of_args, receiver=None, chunk_size=4096, context=None):
+    """
+    对每组参数调用func，每chunk_size组参数进入一次v8，逐个yield结果
+
+    iterable_of_args中的元素为参数tuple/list，其他值当作单个参数；
+    context为func所在的context，不传时使用当前进入的context
+    """
+    helper = _call_many_fn(context)
+    for chunk in _chunks(iterable_of_args, chunk_size):
+        yield from _results(helper(func, receiver, chunk))
+
+
+def call_many(func, iterable_of_args, receiver=None, chunk_size=4096, context=None):
+    """
+    批量调用JSFunction，返回结果列表:
+        tokens = pyv8.call_many(sign, [(a, b) for a, b in data], context=ctx)
+
+    某次调用抛出异常时，以JSException抛出，已完成的结果丢弃
+    """
+    return list(call_many_iter(func, iterable_of_args, receiver, chunk_size, context))
+
+
+def bind_method(obj, name):
+    """
+    返回obj[name].bind(obj)，receiver和函数都固定在js的bound function中，
+    循环中反复调用时不再经过__getattr__创建新的JSFunction包装:
+        get_name = pyv8.bind_method(js_obj, "get_name")
+        for _ in range(n): get_name()
+    """
+    func = obj[name]
+    if not isinstance(func, _pyv8.JSFunction):
+        raise TypeError(f"'{name}' is not a function")
+    return func.bind(obj)
@@ -0,0 +1,303 @@
+import json
+import weakref
+from datetime import datetime, timezone
+
+from . import _pyv8
+
+# 批量转换: 在js侧一次性把整个对象图序列化成JSON字符串，python侧一次json.loads，
+# 避免逐个属性跨越边界、为每个子对象创建JSObject包装
+_TAG = '\x00t'
+
+_SERIALIZER_JS = r"""
+(function (value, maxDepth) {
+    var stack = [];
+    var objToString = Object.prototype.toString;
+    var objKeys = Object.keys;
+    var isArray = Array.isArray;
+    var isView = ArrayBuffer.isView;
+    var getTime = Date.prototype.getTime;
+    var mapEntries = Map.prototype.entries;
+    var setValues = Set.prototype.values;
+    var hex = [];
+    for (var i = 0; i < 256; i++) hex.push((i < 16 ? '0' : '') + i.toString(16));
+
+    function tagged(tag, v) {
+        var o = {};
+        o['\u0000t'] = tag;
+        o.v = v;
+        return o;
+    }
+    function toHex(bytes) {
+        var parts = [], chunk = [];
+        for (var i = 0; i < bytes.length; i++) {
+            chunk.push(hex[bytes[i]]);
+            if (chunk.length === 8192) { parts.push(chunk.join('')); chunk = []; }
+        }
+        parts.push(chunk.join(''));
+        return parts.join('');
+    }
+    function walk(v, depth) {
+        switch (typeof v) {
+            case 'string': case 'boolean': return v;
+            case 'number': return isFinite(v) ? v : tagged('num', String(v));
+            case 'bigint': return tagged('bigint', v.toString());
+            case 'undefined': case 'function': case 'symbol': return null;
+        }
+        if (v === null) return null;
+        var idx = stack.indexOf(v);
+        if (idx !== -1) return tagged('cycle', idx);
+        if (maxDepth !== null && depth >= maxDepth) return null;
+
+        var tag = objToString.call(v);
+        if (tag === '[object Date]') {
+            try { return tagged('date', getTime.call(v)); } catch (e) {}
+        }
+        if (isView(v)) return tagged('bytes', toHex(new Uint8Array(v.buffer, v.byteOffset, v.byteLength)));
+        if (tag === '[object ArrayBuffer]' || tag === '[object SharedArrayBuffer]') {
+            return tagged('bytes', toHex(new Uint8Array(v)));
+        }
+
+        var out, k, it, step;
+        stack.push(v);
+        if (isArray(v)) {
+            out = new Array(v.length);
+            for (k = 0; k < v.length; k++) out[k] = walk(v[k], depth + 1);
+        } else if (tag === '[object Map]' && (it = tryCall(mapEntries, v))) {
+            out = [];
+            while (!(step = it.next()).done) out.push([walk(step.value[0], depth + 1), walk(step.value[1], depth + 1)]);
+            out = tagged('map', out);
+        } else if (tag === '[object Set]' && (it = tryCall(setValues, v))) {
+            out = [];
+            while (!(step = it.next()).done) out.push(walk(step.value, depth + 1));
+            out = tagged('set', out);
+        } else {
+            out = {};
+            var keys = objKeys(v);
+            for (k = 0; k < keys.length; k++) out[keys[k]] = walk(v[keys[k]], depth + 1);
+        }
+        stack.pop();
+        return out;
+    }
+    function tryCall(fn, v) {
+        try { return fn.call(v); } catch (e) { return null; }
+    }
+    return JSON.stringify(walk(value, 0));
+})
+"""
+
+_PARSER_JS = r"""
+(function (text, tagged) {
+    if (!tagged) return JSON.parse(text);
+    return JSON.parse(text, function (key, v) {
+        if (v === null || typeof v !== 'object' || !('\u0000t' in v)) return v;
+        switch (v['\u0000t']) {
+            case 'bytes':
+                var bytes = new Uint8Array(v.v.length / 2);
+                for (var i = 0; i < bytes.length; i++) bytes[i] = parseInt(v.v.substr(i * 2, 2), 16);
+                return bytes;
+            case 'date': return new Date(v.v);
+            case 'set': return new Set(v.v);
+            case 'map': return new Map(v.v);
+            case 'bigint': return BigInt(v.v);
+        }
+        return v;
+    });
+})
+"""
+
+
+_context_caches = weakref.WeakKeyDictionary()
+
+
+def _context_cache(context):
+    """context对应的缓存dict，随context一起释放；context不支持弱引用时返回None"""
+    try:
+        cache = _context_caches.get(context)
+        if cache is None:
+            cache = _context_caches[context] = {}
+    except TypeError:
+        return None
+    return cache
+
+
+def _js_function(context, source):
+    """执行source得到的js函数，每个context只编译一次"""
+    cache = _context_cache(context)
+    if cache is None:
+        return context.exec_js(source)
+    func = cache.get(source)
+    if func is None:
+        func = cache[source] = context.exec_js(source)
+    return func
+
+
+class _Cycle:
+    __slots__ = ('index',)
+
+    def __init__(self, index):
+        self.index = index
+
+
+def _hashable(value):
+    # set元素和map的key会变成不可变的tuple，其中的循环引用无法还原，转换为None
+    if isinstance(value, _Cycle):
+        return None
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, dict):
+        return tuple((k, _hashable(v)) for k, v in value.items())
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def _revive(obj):
+    if len(obj) != 2 or _TAG not in obj:
+        return obj
+    tag, value = obj[_TAG], obj['v']
+    if tag == 'bytes':
+        return bytes.fromhex(value)
+    if tag == 'date':
+        if value is None:
+            return None
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    if tag == 'map':
+        return {_hashable(k): v for k, v in value}
+    if tag == 'set':
+        return {_hashable(v) for v in value}
+    if tag == 'num':
+        return float(value)
+    if tag == 'bigint':
+        return int(value)
+    if tag == 'cycle':
+        return _Cycle(value)
+    return obj
+
+
+def _resolve_cycles(value, stack):
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return
+    stack.append(value)
+    for k, v in items:
+        if isinstance(v, _Cycle):
+            value[k] = stack[v.index]
+        else:
+            _resolve_cycles(v, stack)
+    stack.pop()
+
+
+def deep_convert(context, value, depth=None):
+    """
+    把js对象图一次性复制成python原生对象
+
+    object -> dict, Array -> list, Map -> dict, Set -> set, Date -> datetime(UTC),
+    TypedArray/ArrayBuffer/DataView -> bytes, BigInt -> int。
+    循环引用会还原成python中的循环引用，但Set元素和Map的key中的循环引用转换为None；
+    超过depth层的对象转换为None
+    """
+    if not isinstance(value, _pyv8.JSObject):
+        return value
+    serialize = _js_function(context, _SERIALIZER_JS)
+    text = serialize(value, depth if depth is not None else _pyv8.Null)
+    result = json.loads(text, object_hook=_revive)
+    if '"\\u0000t":"cycle"' in text:
+        if isinstance(result, _Cycle):
+            return None
+        _resolve_cycles(result, [])
+    return result
+
+
+def to_js(context, value):
+    """
+    把python的dict/list等一次性转换为js对象，适合大对象赋值:
+        context.cfg = pyv8.to_js(context, big_dict)
+
+    bytes/bytearray -> Uint8Array, datetime -> Date, set/frozenset -> Set
+    """
+    has_tag = False
+
+    def default(obj):
+        nonlocal has_tag
+        has_tag = True
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            return {_TAG: 'bytes', 'v': bytes(obj).hex()}
+        if isinstance(obj, datetime):
+            return {_TAG: 'date', 'v': obj.timestamp() * 1000}
+        if isinstance(obj, (set, frozenset)):
+            return {_TAG: 'set', 'v': list(obj)}
+        raise TypeError(f'Object of type {type(obj).__name__} is not convertible to js')
+
+    text = json.dumps(value, default=default, ensure_ascii=False, allow_nan=False,
+                      separators=(',', ':'))
+    return _js_function(context, _PARSER_JS)(text, has_tag)
+
+
+_IDENTITY_JS = "(function (v) { return v; })"
+
+
+class LazyObject:
+    """
+    dict的惰性代理，通过__v8_name_get__拦截属性访问，第一次访问某个key时才转换对应的值并缓存。
+    嵌套的dict同样包装成LazyObject，list在第一次访问时转换成js数组(元素中的dict仍是惰性的)。
+    同一个LazyObject可以暴露给多个context，js数组按context分别缓存
+
+    只拦截属性读取，Object.keys/for...in/JSON.stringify看不到代理中的key
+    """
+
+    def __init__(self, data):
+        self.__v8_lazy_data = data
+        self.__v8_lazy_cache = {}
+        self.__v8_lazy_arrays = weakref.WeakKeyDictionary()
+
+    def __v8_name_get__(self, name):
+        cache = self.__v8_lazy_cache
+        if name in cache:
+            value = cache[name]
+        else:
+            data = self.__v8_lazy_data
+            if name not in data:
+                return None
+            value = cache[name] = _lazy_value(data[name])
+        if value is None:
+            # 返回None表示不拦截，js中读到的是undefined
+            return _pyv8.Null
+        if isinstance(value, list):
+            return self.__v8_lazy_array(name, value)
+        return value
+
+    def __v8_lazy_array(self, name, value):
+        # 转换成当前context的js数组后缓存，保证多次访问拿到的是同一个js对象
+        ctx = _pyv8.current_context()
+        if ctx is None:
+            return value
+        try:
+            arrays = self.__v8_lazy_arrays.get(ctx)
+            if arrays is None:
+                arrays = self.__v8_lazy_arrays[ctx] = {}
+        except TypeError:
+            arrays = {}
+        array = arrays.get(name)
+        if array is None:
+            array = arrays[name] = _js_function(ctx, _IDENTITY_JS)(value)
+        return array
+
+
+def _lazy_value(value):
+    if isinstance(value, dict):
+        return LazyObject(value)
+    if isinstance(value, (list, tuple)):
+        return [_lazy_value(v) for v in value]
+    return value
+
+
+def lazy(data):
+    """
+    惰性暴露大的dict，例如: context.expose(cfg=pyv8.lazy(big_dict))
+    """
+    if not isinstance(data, dict):
+        raise TypeError(f'lazy() expects a dict, got {type(data).__name__}')
+    return LazyObject(data)
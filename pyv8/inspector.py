@@ -0,0 +1,157 @@
+import itertools
+import json
+import queue
+import threading
+from concurrent.futures import Future
+
+from . import _pyv8
+
+
+class InspectorError(Exception):
+    """inspector协议返回的错误"""
+
+    def __init__(self, method, error):
+        super().__init__(f"{method}: {error.get('message')} ({error.get('code')})")
+        self.method = method
+        self.error = error
+
+
+_QUIT = object()
+
+
+class InspectorSession(_pyv8.Debugger):
+    """
+    进程内的inspector会话，直接通过Debugger.send/handle收发协议消息，不需要websocket和信号处理
+
+    send返回concurrent.futures.Future；大部分命令在v8处理期间同步返回，call直接拿到结果。
+    v8只能在创建会话的线程中处理消息，其他线程调用send时消息进入队列，
+    在js暂停(断点/debugger语句)期间或者调用pump时处理
+    """
+
+    def __init__(self, context):
+        super().__init__(context)
+        self.context = context
+        self._ids = itertools.count(1)
+        self._futures = {}
+        self._listeners = {}
+        self._pending = queue.Queue()
+        self._thread = threading.get_ident()
+        self.paused = False
+
+    def handle(self, message):
+        message = json.loads(message)
+        if 'id' in message:
+            future = self._futures.pop(message['id'], None)
+            if future is None:
+                return
+            if 'error' in message:
+                future.set_exception(InspectorError(future.method, message['error']))
+            else:
+                future.set_result(message.get('result', {}))
+            return
+        method = message.get('method')
+        params = message.get('params', {})
+        for callback in list(self._listeners.get(method, ())):
+            callback(params)
+        for callback in list(self._listeners.get('*', ())):
+            callback(method, params)
+
+    def _dispatch(self, data):
+        _pyv8.Debugger.send(self, data)
+
+    def _request(self, method, params):
+        msg_id = next(self._ids)
+        future = Future()
+        future.method = method
+        self._futures[msg_id] = future
+        return msg_id, future, json.dumps({'id': msg_id, 'method': method, 'params': params or {}})
+
+    def send(self, method, params=None):
+        _, future, data = self._request(method, params)
+        self.post(data)
+        return future
+
+    def post(self, data):
+        """发送原始协议消息(str/bytes)，返回结果通过handle回调"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if threading.get_ident() == self._thread:
+            self._dispatch(data)
+        else:
+            self._pending.put(data)
+
+    def call(self, method, **params):
+        """同步调用，只能在创建会话的线程中使用，其他线程使用send"""
+        if threading.get_ident() != self._thread:
+            raise RuntimeError('InspectorSession.call can only be used in the thread '
+                               'that created the session, use send() instead')
+        msg_id, future, data = self._request(method, params)
+        self.post(data)
+        if not future.done():
+            # 之后才到达的响应直接丢弃
+            self._futures.pop(msg_id, None)
+            raise InspectorError(method, {'message': 'no response', 'code': None})
+        return future.result()
+
+    def pump(self):
+        """处理其他线程通过send放入队列的消息"""
+        while True:
+            try:
+                data = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            if data is not _QUIT:
+                self._dispatch(data)
+
+    def on(self, event, callback):
+        """
+        注册事件回调callback(params)；event为'*'时接收所有事件callback(method, params)
+        """
+        self._listeners.setdefault(event, []).append(callback)
+
+    def off(self, event, callback):
+        self._listeners.get(event, []).remove(callback)
+
+    # js暂停时v8调用run_loop，直到恢复执行时调用quit_loop
+    def run_loop(self):
+        self.paused = True
+        try:
+            while True:
+                data = self._pending.get()
+                if data is _QUIT:
+                    return
+                self._dispatch(data)
+        finally:
+            self.paused = False
+
+    def quit_loop(self):
+        if self.paused:
+            self._pending.put(_QUIT)
+
+    def close(self):
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        self._listeners.clear()
+
+
+def heap_statistics(context, session=None):
+    """
+    isolate的堆使用情况(字节): used_size, total_size, embedder_used_size, backing_storage_size
+
+    需要反复采集时传入同一个session复用，否则每次调用临时创建会话，用完后关闭
+    """
+    owned = session is None
+    if owned:
+        session = InspectorSession(context)
+    try:
+        result = session.call('Runtime.getHeapUsage')
+    finally:
+        if owned:
+            session.close()
+    return {
+        'used_size': result.get('usedSize', 0),
+        'total_size': result.get('totalSize', 0),
+        'embedder_used_size': result.get('embedderHeapUsedSize', 0),
+        'backing_storage_size': result.get('backingStorageSize', 0),
+    }
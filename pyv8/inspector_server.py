@@ -0,0 +1,294 @@
+import asyncio
+import base64
+import hashlib
+import ipaddress
+import json
+import struct
+import threading
+import uuid
+
+from . import _pyv8
+from .inspector import InspectorSession
+
+_WS_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+_OP_CONT, _OP_TEXT, _OP_BINARY, _OP_CLOSE, _OP_PING, _OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+_CLOSE_TOO_BIG = struct.pack('!H', 1009)
+
+
+class _MessageTooBig(Exception):
+    pass
+
+
+def _ws_frame(opcode, payload):
+    n = len(payload)
+    if n < 126:
+        header = struct.pack('!BB', 0x80 | opcode, n)
+    elif n < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, n)
+    return header + payload
+
+
+async def _ws_read_frame(reader, max_size):
+    b1, b2 = await reader.readexactly(2)
+    length = b2 & 0x7f
+    if length == 126:
+        length, = struct.unpack('!H', await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack('!Q', await reader.readexactly(8))
+    if length > max_size:
+        raise _MessageTooBig()
+    mask = await reader.readexactly(4) if b2 & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask and length:
+        key = (mask * (length // 4 + 1))[:length]
+        payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+    return bool(b1 & 0x80), b1 & 0x0f, payload
+
+
+def _allowed_host(host):
+    # 和node的inspector一样，Host只能是ip地址或localhost，防止DNS rebinding攻击
+    if not host:
+        return True
+    host = host.lower()
+    if host.startswith('['):
+        end = host.find(']')
+        if end < 0:
+            return False
+        host = host[1:end]
+    else:
+        host = host.partition(':')[0]
+    if host in ('localhost', 'localhost6'):
+        return True
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+class _TargetSession(InspectorSession):
+    # 把v8返回的协议消息原样转发给当前连接的websocket
+    def __init__(self, context):
+        super().__init__(context)
+        self.emit = None
+
+    def handle(self, message):
+        if self.emit is not None:
+            self.emit(message)
+
+
+class DevToolsTarget:
+    def __init__(self, context, title, url):
+        self.id = str(uuid.uuid4())
+        self.context = context
+        self.title = title
+        self.url = url
+        self.session = _TargetSession(context)
+        self.connected = False
+
+
+class DevToolsServer:
+    """
+    基于asyncio的devtools服务，网络收发在后台线程的事件循环中进行，不阻塞执行js的线程
+
+    - /json/list, /json/version 提供target发现，每个注册的context是一个target
+    - 不同target可以同时各自连接一个devtools会话
+    - v8只能在创建target的线程中处理消息: 由该线程调用pump()，js暂停(断点)时自动处理
+    - Host头不是ip地址或localhost的请求被拒绝
+    - 超过max_message_size(字节)的websocket消息会断开连接
+    """
+
+    def __init__(self, host='127.0.0.1', port=9229, max_message_size=64 << 20):
+        self.host = host
+        self.port = port
+        self.max_message_size = max_message_size
+        self.targets = {}
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._writers = set()
+
+    def add_target(self, context, title=None, url=''):
+        """在执行js的线程中调用，返回target"""
+        target = DevToolsTarget(context, title or f'pyv8 context {len(self.targets) + 1}', url)
+        self.targets[target.id] = target
+        return target
+
+    def remove_target(self, target):
+        target = self.targets.pop(getattr(target, 'id', target), None)
+        if target is not None:
+            target.session.emit = None
+            target.session.close()
+
+    def pump(self):
+        """处理devtools发来的消息，需要在执行js的线程中定期调用，例如每个任务之间"""
+        for target in list(self.targets.values()):
+            target.session.pump()
+
+    def start(self):
+        ready = threading.Event()
+        error = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._server = self._loop.run_until_complete(
+                    asyncio.start_server(self._handle_client, self.host, self.port))
+            except OSError as e:
+                error.append(e)
+                ready.set()
+                return
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+            self._server.close()
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name='pyv8-devtools', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if error:
+            raise error[0]
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            # 关闭连接后websocket读取结束，连接处理协程自行退出
+            for writer in list(self._writers):
+                writer.close()
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            if tasks:
+                _, pending = await asyncio.wait(tasks, timeout=1)
+                for task in pending:
+                    task.cancel()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _target_info(self, target):
+        address = f'{self.host}:{self.port}/{target.id}'
+        return {
+            'description': 'pyv8 instance',
+            'devtoolsFrontendUrl':
+                f'devtools://devtools/bundled/js_app.html?experiments=true&v8only=true&ws={address}',
+            'id': target.id,
+            'title': target.title,
+            'type': 'node',
+            'url': target.url,
+            'webSocketDebuggerUrl': f'ws://{address}',
+        }
+
+    async def _handle_client(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            await self._handle_request(reader, writer)
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _handle_request(self, reader, writer):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            return
+        lines = head.decode('latin-1').split('\r\n')
+        parts = lines[0].split(' ')
+        path = parts[1].split('?')[0].rstrip('/') if len(parts) > 1 else ''
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+
+        if not _allowed_host(headers.get('host')):
+            self._http_response(writer, 400, b'')
+        elif headers.get('upgrade', '').lower() == 'websocket':
+            target = self.targets.get(path.lstrip('/'))
+            if 'sec-websocket-key' not in headers:
+                self._http_response(writer, 400, b'')
+            elif target is None or target.connected:
+                self._http_response(writer, 404 if target is None else 409, b'')
+            else:
+                await self._serve_websocket(target, headers, reader, writer)
+        elif path in ('/json', '/json/list'):
+            body = [self._target_info(target) for target in self.targets.values()]
+            self._http_response(writer, 200, json.dumps(body).encode('utf-8'))
+        elif path == '/json/version':
+            body = {'Browser': f'pyv8/{_pyv8.v8_version()}', 'Protocol-Version': '1.3'}
+            self._http_response(writer, 200, json.dumps(body).encode('utf-8'))
+        else:
+            self._http_response(writer, 404, b'')
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    @staticmethod
+    def _http_response(writer, status, body):
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 409: 'Conflict'}[status]
+        writer.write(
+            f'HTTP/1.1 {status} {reason}\r\nContent-Type: application/json; charset=UTF-8\r\n'
+            f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode('latin-1') + body
+        )
+
+    async def _serve_websocket(self, target, headers, reader, writer):
+        accept = base64.b64encode(hashlib.sha1(headers['sec-websocket-key'].encode() + _WS_GUID).digest())
+        writer.write(
+            b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+            b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n'
+        )
+        loop = asyncio.get_running_loop()
+        session = target.session
+        target.connected = True
+
+        def emit(message):
+            # 在执行js的线程中被调用
+            if isinstance(message, str):
+                message = message.encode('utf-8')
+            loop.call_soon_threadsafe(writer.write, _ws_frame(_OP_TEXT, message))
+
+        session.emit = emit
+        fragments = []
+        size = 0
+        try:
+            while True:
+                fin, opcode, payload = await _ws_read_frame(reader, self.max_message_size - size)
+                if opcode == _OP_CLOSE:
+                    writer.write(_ws_frame(_OP_CLOSE, payload[:2]))
+                    break
+                if opcode == _OP_PING:
+                    writer.write(_ws_frame(_OP_PONG, payload))
+                    continue
+                if opcode in (_OP_TEXT, _OP_BINARY, _OP_CONT):
+                    fragments.append(payload)
+                    size += len(payload)
+                    if fin:
+                        session.post(b''.join(fragments))
+                        fragments = []
+                        size = 0
+        except _MessageTooBig:
+            writer.write(_ws_frame(_OP_CLOSE, _CLOSE_TOO_BIG))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            session.emit = None
+            target.connected = False
+            # devtools断开时js可能还停在断点上
+            session.post(json.dumps({'id': -1, 'method': 'Debugger.resume'}))
+            session.post(json.dumps({'id': -2, 'method': 'Debugger.disable'}))
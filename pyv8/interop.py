@@ -0,0 +1,161 @@
+import inspect
+import time
+from functools import wraps
+
+from .flag import CallbackType
+
+
+class CallbackStats:
+    """
+    单个回调的统计，histogram[i]为耗时落在 [2^(i-1), 2^i) 微秒区间内的调用次数
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max', 'errors', 'histogram')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.errors = 0
+        self.histogram = [0] * 32
+
+    def add(self, elapsed, error=False):
+        self.count += 1
+        self.total += elapsed
+        if self.min is None or elapsed < self.min:
+            self.min = elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        if error:
+            self.errors += 1
+        self.histogram[min(int(elapsed * 1e6).bit_length(), 31)] += 1
+
+    @property
+    def avg(self):
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self):
+        last = max((i for i, n in enumerate(self.histogram) if n), default=-1)
+        return {
+            'count': self.count,
+            'total': self.total,
+            'avg': self.avg,
+            'min': self.min or 0.0,
+            'max': self.max,
+            'errors': self.errors,
+            'histogram_us': {(1 << i): n for i, n in enumerate(self.histogram[:last + 1]) if n},
+        }
+
+
+class InteropStats:
+    def __init__(self):
+        self.callbacks = {}
+
+    def get(self, key):
+        stats = self.callbacks.get(key)
+        if stats is None:
+            stats = self.callbacks[key] = CallbackStats()
+        return stats
+
+    def reset(self):
+        # 已经instrument的回调持有各自的CallbackStats，只能原地清零
+        for stats in self.callbacks.values():
+            stats.reset()
+
+    def snapshot(self):
+        """按总耗时从大到小排序的 {"类名.属性名": 统计} 字典，不包括没有被调用过的回调"""
+        items = sorted(
+            ((key, stats) for key, stats in self.callbacks.items() if stats.count),
+            key=lambda kv: kv[1].total, reverse=True,
+        )
+        return {key: stats.to_dict() for key, stats in items}
+
+
+# instrument默认使用的全局统计
+interop = InteropStats()
+
+
+def interop_stats():
+    return interop.snapshot()
+
+
+def reset_interop_stats():
+    interop.reset()
+
+
+def _callbacks(cls):
+    # (类, 回调函数名, 统计key)
+    for klass in cls.__mro__[:-1]:
+        name = klass.__name__
+        for method in klass.__dict__.get('__v8_method__', ()):
+            if method[3] == CallbackType.kPy:
+                yield klass, method[1], f"{name}.{method[0]}"
+        for attr in klass.__dict__.get('__v8_attribute__', ()):
+            if attr[3] == CallbackType.kPy:
+                if attr[1]:
+                    yield klass, attr[1], f"{name}.{attr[0]} get"
+                if attr[2]:
+                    yield klass, attr[2], f"{name}.{attr[0]} set"
+        if '__v8_name_get__' in klass.__dict__:
+            yield klass, '__v8_name_get__', f"{name}.__v8_name_get__"
+
+
+def _wrap(cls, cb_name, key, stats):
+    func = getattr(cls, cb_name, None)
+    if func is None or getattr(func, '__v8_instrumented__', False):
+        return
+    if isinstance(inspect.getattr_static(cls, cb_name), (staticmethod, classmethod)):
+        return
+    callback_stats = stats.get(key)
+    perf_counter = time.perf_counter
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            callback_stats.add(perf_counter() - start, True)
+            raise
+        callback_stats.add(perf_counter() - start)
+        return result
+
+    wrapper.__v8_instrumented__ = True
+    wrapper.__v8_stats__ = stats
+    wrapper.__v8_own__ = cb_name in cls.__dict__
+    setattr(cls, cb_name, wrapper)
+
+
+def instrument(cls, stats=None):
+    """
+    为类(包括父类)中__v8_method__/__v8_attribute__声明的python回调以及__v8_name_get__加上计时，
+    统计记录到stats(默认是全局的interop)中。没有instrument的类没有任何额外开销
+
+    统计对象绑定在类上，同一个类(包括父类)的所有实例、所有context共用；
+    已经instrument到其他stats的类再次instrument时抛出ValueError并且不做任何修改，需要先uninstrument
+    """
+    stats = stats if stats is not None else interop
+    callbacks = list(_callbacks(cls))
+    # 先全部检查再修改，避免抛出异常时只instrument了一部分
+    for klass, cb_name, key in callbacks:
+        func = getattr(klass, cb_name, None)
+        if getattr(func, '__v8_instrumented__', False) and func.__v8_stats__ is not stats:
+            raise ValueError(f"{key} is already instrumented with another InteropStats")
+    for klass, cb_name, key in callbacks:
+        _wrap(klass, cb_name, key, stats)
+    return cls
+
+
+def uninstrument(cls):
+    for klass in cls.__mro__[:-1]:
+        for cb_name, value in list(klass.__dict__.items()):
+            if getattr(value, '__v8_instrumented__', False):
+                if value.__v8_own__:
+                    setattr(klass, cb_name, value.__wrapped__)
+                else:
+                    delattr(klass, cb_name)
+    return cls
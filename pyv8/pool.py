@@ -0,0 +1,105 @@
+import time
+from collections import deque
+
+from . import _pyv8
+
+
+class PoolStats:
+    def __init__(self):
+        self.hits = 0           # acquire时直接拿到预热好的context
+        self.misses = 0         # acquire时池子为空，现场创建context
+        self.resets = 0         # release后重建的context数量
+        self.build_time = 0.0   # 创建context的总耗时(秒)
+        self.reset_time = 0.0   # release时重置context的总耗时(秒)
+
+    @property
+    def avg_reset_time(self):
+        return self.reset_time / self.resets if self.resets else 0.0
+
+    def __repr__(self):
+        return (f"PoolStats(hits={self.hits}, misses={self.misses}, resets={self.resets}, "
+                f"build_time={self.build_time:.6f}, reset_time={self.reset_time:.6f})")
+
+
+class ContextPool:
+    """
+    预热的Context池
+
+    factory: 返回global_this对象的可调用对象，例如Window类
+    setup:   context创建后调用setup(ctx)，用于expose类、执行补环境代码等
+    其余参数原样传给Context.__init__
+    """
+
+    def __init__(self, factory, size=4, setup=None, hook=False, ctx_type=None, timeout=None):
+        self.factory = factory
+        self.size = size
+        self.setup = setup
+        self.hook = hook
+        self.ctx_type = ctx_type
+        self.timeout = timeout
+        self.stats = PoolStats()
+        self._idle = deque()
+        self._in_use = {}  # id(ctx) -> ctx，持有引用避免id被其他context复用
+        self.fill()
+
+    def _build(self):
+        start = time.perf_counter()
+        kwargs = {'hook': self.hook}
+        if self.ctx_type is not None:
+            kwargs['ctx_type'] = self.ctx_type
+        if self.timeout is not None:
+            kwargs['timeout'] = self.timeout
+        ctx = _pyv8.Context(self.factory(), **kwargs)
+        if self.setup is not None:
+            self.setup(ctx)
+        self.stats.build_time += time.perf_counter() - start
+        return ctx
+
+    def fill(self):
+        while len(self._idle) < self.size:
+            self._idle.append(self._build())
+
+    def acquire(self):
+        try:
+            ctx = self._idle.popleft()
+            self.stats.hits += 1
+        except IndexError:
+            ctx = self._build()
+            self.stats.misses += 1
+        self._in_use[id(ctx)] = ctx
+        return ctx
+
+    def release(self, ctx):
+        # 脚本可能修改了globalThis上的任意对象(包括原型链)，原地还原不可靠，
+        # 所以直接丢弃用过的context，用factory重建一个全新的放回池中
+        if self._in_use.get(id(ctx)) is not ctx:
+            raise ValueError('context does not belong to this pool')
+        del self._in_use[id(ctx)]
+        start = time.perf_counter()
+        if len(self._idle) < self.size:
+            self._idle.append(self._build())
+        self.stats.resets += 1
+        self.stats.reset_time += time.perf_counter() - start
+
+    def context(self):
+        return _PooledContext(self)
+
+    def clear(self):
+        self._idle.clear()
+
+    def __len__(self):
+        return len(self._idle)
+
+
+class _PooledContext:
+    def __init__(self, pool):
+        self.pool = pool
+        self.ctx = None
+
+    def __enter__(self):
+        self.ctx = self.pool.acquire()
+        return self.ctx
+
+    def __exit__(self, *exc):
+        ctx, self.ctx = self.ctx, None
+        self.pool.release(ctx)
@@ -0,0 +1,224 @@
+import multiprocessing
+import pickle
+import queue
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+from . import _pyv8
+from .convert import deep_convert
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+
+class ProcessPoolError(Exception):
+    """worker进程中抛出的非js异常，remote_traceback为worker中的调用栈"""
+
+    def __init__(self, message, remote_traceback=''):
+        super().__init__(message)
+        self.remote_traceback = remote_traceback
+
+
+class WorkerCrashed(ProcessPoolError):
+    """worker进程在执行任务时退出(例如segfault)"""
+
+
+_OK, _SHM, _ERROR = 0, 1, 2
+
+
+def _rss():
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss在macOS下单位是字节，linux等其他平台是KB
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def _unlink_shm(name):
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def _worker_main(conn, init, shm_threshold):
+    ctx = init()
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        name, args = job
+        try:
+            if args is None:
+                result = ctx.exec_js(name)
+            else:
+                result = getattr(ctx, name)(*args)
+            data = pickle.dumps(deep_convert(ctx, result), protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException as e:
+            conn.send((_ERROR, (type(e).__name__, str(e), traceback.format_exc()), _rss()))
+            if isinstance(e, _pyv8.JavaScriptTerminated):
+                return
+            continue
+        if len(data) >= shm_threshold:
+            # 大结果放到共享内存中，只通过管道传递共享内存的名称，由主进程读取后释放
+            shm = shared_memory.SharedMemory(create=True, size=len(data))
+            shm.buf[:len(data)] = data
+            conn.send((_SHM, (shm.name, len(data)), _rss()))
+            shm.close()
+        else:
+            conn.send((_OK, data, _rss()))
+
+
+class _Worker:
+    def __init__(self, mp_context, init, shm_threshold):
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(target=_worker_main, args=(child_conn, init, shm_threshold), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.rss = 0
+
+    def stop(self, timeout=1):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self._discard_results()
+        self.conn.close()
+
+    def _discard_results(self):
+        # 超时重启时worker可能已经把结果写进了共享内存，主进程没有读取，在这里释放
+        try:
+            while self.conn.poll():
+                status, payload, _ = self.conn.recv()
+                if status == _SHM:
+                    _unlink_shm(payload[0])
+        except (EOFError, OSError):
+            pass
+
+
+class ProcessPool:
+    """
+    多进程执行池，每个worker进程调用一次init()创建好Context，之后循环处理任务
+
+    init:          可pickle的函数(模块级函数)，在worker进程中调用，返回pyv8.Context
+    max_jobs:      worker处理多少个任务后重启
+    max_rss:       worker进程内存峰值(字节)超过该值后重启
+    timeout:       等待单个任务结果的超时时间(秒)，超时的worker会被杀掉重启
+    shm_threshold: pickle后的结果超过该大小(字节)时通过共享内存传递
+    """
+
+    def __init__(self, n, init, max_jobs=None, max_rss=None, timeout=None, shm_threshold=1 << 20,
+                 start_method='spawn'):
+        # v8初始化后会创建平台线程，fork出来的子进程不可用，默认使用spawn
+        self._mp = multiprocessing.get_context(start_method)
+        self.n = n
+        self.init = init
+        self.max_jobs = max_jobs
+        self.max_rss = max_rss
+        self.timeout = timeout
+        self.shm_threshold = shm_threshold
+        self.restarts = 0
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._executor = None
+        self._closed = False
+        for _ in range(n):
+            self._add_worker()
+
+    def _add_worker(self):
+        worker = _Worker(self._mp, self.init, self.shm_threshold)
+        self._workers.add(worker)
+        self._idle.put(worker)
+
+    def _restart(self, worker):
+        self._workers.discard(worker)
+        worker.stop()
+        self.restarts += 1
+        if not self._closed:
+            self._add_worker()
+
+    def run(self, script_or_fn_name, args=None):
+        """
+        args为None时把script_or_fn_name当作js代码执行，否则调用全局函数script_or_fn_name(*args)
+        返回值通过deep_convert转换为python原生对象
+        """
+        if self._closed:
+            raise RuntimeError('ProcessPool is closed')
+        worker = self._idle.get()
+        try:
+            worker.conn.send((script_or_fn_name, None if args is None else tuple(args)))
+            finished = worker.conn.poll(self.timeout)
+            if finished:
+                status, payload, worker.rss = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self._restart(worker)
+            raise WorkerCrashed(f'worker exited with code {worker.process.exitcode}') from e
+        except BaseException:
+            self._restart(worker)
+            raise
+        if not finished:
+            self._restart(worker)
+            raise TimeoutError(f'job did not finish in {self.timeout}s')
+
+        worker.jobs += 1
+        if status == _ERROR:
+            name, message, remote_tb = payload
+            if name == 'JavaScriptTerminated':
+                # 超时被终止的worker进程已经退出
+                self._restart(worker)
+                raise _pyv8.JavaScriptTerminated(message)
+            self._release(worker)
+            if name == 'JSException':
+                raise _pyv8.JSException(message)
+            raise ProcessPoolError(f'{name}: {message}', remote_tb)
+
+        self._release(worker)
+        if status == _SHM:
+            shm_name, size = payload
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                payload = bytes(shm.buf[:size])
+            finally:
+                shm.close()
+                shm.unlink()
+        return pickle.loads(payload)
+
+    def _release(self, worker):
+        if (self.max_jobs is not None and worker.jobs >= self.max_jobs) or \
+                (self.max_rss is not None and worker.rss >= self.max_rss):
+            self._restart(worker)
+        else:
+            self._idle.put(worker)
+
+    def submit(self, script_or_fn_name, args=None):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.n)
+        return self._executor.submit(self.run, script_or_fn_name, args)
+
+    def close(self):
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown()
+        for worker in list(self._workers):
+            worker.stop()
+        self._workers.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,410 @@
+import bisect
+import json
+from collections import Counter
+
+from .inspector import InspectorSession
+
+
+class AllocationNode:
+    """采样堆分析的调用树节点，self_size为该栈帧自身分配的字节数，total_size包含子节点"""
+
+    __slots__ = ('function_name', 'url', 'line', 'column', 'self_size', 'total_size', 'children')
+
+    def __init__(self, node):
+        frame = node['callFrame']
+        self.function_name = frame.get('functionName') or '(anonymous)'
+        self.url = frame.get('url', '')
+        self.line = frame.get('lineNumber', -1)
+        self.column = frame.get('columnNumber', -1)
+        self.self_size = node.get('selfSize', 0)
+        self.children = [AllocationNode(child) for child in node.get('children', ())]
+        self.total_size = self.self_size + sum(child.total_size for child in self.children)
+
+    def walk(self, stack=()):
+        """深度优先遍历，yield (调用栈, 节点)"""
+        stack = stack + (self,)
+        yield stack, self
+        for child in self.children:
+            yield from child.walk(stack)
+
+    def __repr__(self):
+        return f"AllocationNode({self.function_name} {self.url}:{self.line}, total_size={self.total_size})"
+
+
+class HeapProfiler:
+    """
+    通过进程内的inspector会话导出堆快照和采样堆分析结果，不需要devtools
+    """
+
+    def __init__(self, context):
+        self.session = InspectorSession(context)
+        self.session.call('HeapProfiler.enable')
+
+    def take_snapshot(self, path):
+        """把.heapsnapshot逐块写入文件，不在内存中拼接完整快照"""
+        with open(path, 'w', encoding='utf-8') as f:
+            def write_chunk(params):
+                f.write(params['chunk'])
+
+            self.session.on('HeapProfiler.addHeapSnapshotChunk', write_chunk)
+            try:
+                self.session.call('HeapProfiler.takeHeapSnapshot', reportProgress=False)
+            finally:
+                self.session.off('HeapProfiler.addHeapSnapshotChunk', write_chunk)
+        return path
+
+    def start_sampling(self, sampling_interval=32768):
+        """sampling_interval: 平均每分配多少字节采样一次"""
+        self.session.call('HeapProfiler.startSampling', samplingInterval=sampling_interval)
+
+    def stop_sampling(self):
+        """返回调用树的根节点AllocationNode"""
+        profile = self.session.call('HeapProfiler.stopSampling')['profile']
+        return AllocationNode(profile['head'])
+
+    def close(self):
+        self.session.call('HeapProfiler.disable')
+
+
+def take_heap_snapshot(context, path):
+    profiler = HeapProfiler(context)
+    try:
+        return profiler.take_snapshot(path)
+    finally:
+        profiler.close()
+
+
+def start_sampling_heap_profiler(context, sampling_interval=32768):
+    """开始采样堆分析，返回的HeapProfiler传给stop_sampling_heap_profiler"""
+    profiler = HeapProfiler(context)
+    profiler.start_sampling(sampling_interval)
+    return profiler
+
+
+def stop_sampling_heap_profiler(profiler):
+    try:
+        return profiler.stop_sampling()
+    finally:
+        profiler.close()
+
+
+# v8生成的特殊节点，不对应任何函数
+_META_FRAMES = frozenset(('(root)', '(program)', '(idle)', '(garbage collector)'))
+
+
+class CpuProfile:
+    """
+    cpu分析结果，profile为inspector返回的原始数据(即Chrome .cpuprofile格式)
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.nodes = {node['id']: node for node in profile['nodes']}
+        self._parents = {}
+        for node in profile['nodes']:
+            for child in node.get('children', ()):
+                self._parents[child] = node['id']
+
+    @property
+    def duration(self):
+        """采样总时长(微秒)"""
+        return self.profile['endTime'] - self.profile['startTime']
+
+    def save(self, path):
+        """保存为.cpuprofile文件，可以直接拖到devtools的Performance面板中查看"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.profile, f)
+        return path
+
+    @staticmethod
+    def frame_name(node):
+        frame = node['callFrame']
+        name = frame.get('functionName')
+        if name in _META_FRAMES:
+            return name
+        script_id = str(frame.get('scriptId', '0'))
+        if script_id == '0':
+            # 不属于任何脚本的帧: 暴露给js的python回调以及console等其他native函数，
+            # profile中没有区分它们的信息，按函数名区分
+            return f"{name or '(anonymous)'} [native]"
+        # exec_js没有指定filename的脚本url为空，用scriptId区分
+        url = frame.get('url') or f'(script-{script_id})'
+        line = frame.get('lineNumber', -1) + 1
+        if not name:
+            # 匿名函数加上列号，压缩代码中的函数大多在同一行
+            return f"(anonymous) ({url}:{line}:{frame.get('columnNumber', -1) + 1})"
+        return f"{name} ({url}:{line})"
+
+    def stack(self, node_id):
+        frames = []
+        while node_id is not None:
+            node = self.nodes[node_id]
+            if node['callFrame'].get('functionName') != '(root)':
+                frames.append(self.frame_name(node))
+            node_id = self._parents.get(node_id)
+        frames.reverse()
+        return frames
+
+    def folded(self):
+        """
+        折叠栈文本，每行 "frame1;frame2;frame3 采样数"，可以直接交给flamegraph.pl/speedscope等工具
+        """
+        counts = Counter(self.profile.get('samples', ()))
+        lines = []
+        for node_id, count in counts.items():
+            frames = self.stack(node_id)
+            if frames:
+                lines.append(f"{';'.join(frames)} {count}")
+        lines.sort()
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def save_folded(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.folded())
+        return path
+
+
+class CpuProfiler:
+    """
+    通过进程内的inspector会话进行cpu采样分析，不需要devtools
+    """
+
+    def __init__(self, context):
+        self.session = InspectorSession(context)
+        self.session.call('Profiler.enable')
+
+    def start(self, sampling_interval_us=1000):
+        self.session.call('Profiler.setSamplingInterval', interval=sampling_interval_us)
+        self.session.call('Profiler.start')
+
+    def stop(self):
+        return CpuProfile(self.session.call('Profiler.stop')['profile'])
+
+    def close(self):
+        self.session.call('Profiler.disable')
+
+
+def start_cpu_profile(context, sampling_interval_us=1000):
+    """开始cpu采样分析，返回的CpuProfiler传给stop_cpu_profile"""
+    profiler = CpuProfiler(context)
+    profiler.start(sampling_interval_us)
+    return profiler
+
+
+def stop_cpu_profile(profiler):
+    try:
+        return profiler.stop()
+    finally:
+        profiler.close()
+
+
+class ScriptCoverage:
+    """
+    单个脚本的覆盖率，functions为inspector返回的FunctionCoverage列表，
+    每个函数的ranges[0]是函数本身，之后是函数内的代码块，offset为源码中的字符位置
+    """
+
+    def __init__(self, script_id, url, source, functions):
+        self.script_id = script_id
+        self.url = url
+        self.source = source
+        self.functions = functions
+        self._line_counts = None
+        self._line_starts = [0]
+        i = source.find('\n')
+        while i != -1:
+            self._line_starts.append(i + 1)
+            i = source.find('\n', i + 1)
+
+    def position(self, offset):
+        """字符位置转换为(行, 列)，行从1开始，列从0开始"""
+        line = bisect.bisect_right(self._line_starts, offset) - 1
+        return line + 1, offset - self._line_starts[line]
+
+    def _location(self, start, end):
+        start_line, start_col = self.position(start)
+        end_line, end_col = self.position(end)
+        return {'start': {'line': start_line, 'column': start_col}, 'end': {'line': end_line, 'column': end_col}}
+
+    def line_counts(self):
+        """{行号: 执行次数}，次数取包含该行第一个非空白字符的最内层代码块"""
+        if self._line_counts is not None:
+            return self._line_counts
+        # 代码块之间只有嵌套关系，按(起点, -终点)排序后和行首位置一起扫描一遍，
+        # 栈中保存当前位置所在的代码块，栈顶为最内层
+        ranges = sorted(
+            (r for fn in self.functions for r in fn['ranges']),
+            key=lambda r: (r['startOffset'], -r['endOffset']),
+        )
+        counts = {}
+        stack = []
+        pos = 0
+        for index, start in enumerate(self._line_starts):
+            end = self._line_starts[index + 1] - 1 if index + 1 < len(self._line_starts) else len(self.source)
+            text = self.source[start:end]
+            if not text.strip():
+                continue
+            offset = start + len(text) - len(text.lstrip())
+            while pos < len(ranges) and ranges[pos]['startOffset'] <= offset:
+                r = ranges[pos]
+                while stack and stack[-1]['endOffset'] <= r['startOffset']:
+                    stack.pop()
+                stack.append(r)
+                pos += 1
+            while stack and stack[-1]['endOffset'] <= offset:
+                stack.pop()
+            if stack:
+                counts[index + 1] = stack[-1]['count']
+        self._line_counts = counts
+        return counts
+
+    def function_names(self):
+        """
+        每个函数的名称，和functions一一对应。lcov按名称合并FN/FNDA记录，
+        所以匿名函数以及重名的函数加上位置，例如 "(anonymous)@3:15"
+        """
+        names = [fn['functionName'] or '(anonymous)' for fn in self.functions]
+        counts = Counter(names)
+        for i, fn in enumerate(self.functions):
+            if not fn['functionName'] or counts[names[i]] > 1:
+                line, col = self.position(fn['ranges'][0]['startOffset'])
+                names[i] = f'{names[i]}@{line}:{col + 1}'
+        return names
+
+    def to_istanbul(self):
+        """Istanbul的文件覆盖率对象，行作为statement，代码块作为branch"""
+        fn_map, f, branch_map, b = {}, {}, {}, {}
+        names = self.function_names()
+        for i, fn in enumerate(self.functions):
+            first = fn['ranges'][0]
+            loc = self._location(first['startOffset'], first['endOffset'])
+            fn_map[str(i)] = {'name': names[i], 'decl': loc, 'loc': loc,
+                              'line': loc['start']['line']}
+            f[str(i)] = first['count']
+            for block in fn['ranges'][1:]:
+                key = str(len(branch_map))
+                loc = self._location(block['startOffset'], block['endOffset'])
+                branch_map[key] = {'type': 'branch', 'loc': loc, 'locations': [loc], 'line': loc['start']['line']}
+                b[key] = [block['count']]
+        statement_map, s = {}, {}
+        for i, (line, count) in enumerate(sorted(self.line_counts().items())):
+            end = self._line_starts[line] - 1 if line < len(self._line_starts) else len(self.source)
+            statement_map[str(i)] = {'start': {'line': line, 'column': 0},
+                                     'end': {'line': line, 'column': end - self._line_starts[line - 1]}}
+            s[str(i)] = count
+        return {'path': self.url, 'statementMap': statement_map, 's': s,
+                'fnMap': fn_map, 'f': f, 'branchMap': branch_map, 'b': b}
+
+    def to_lcov(self):
+        lines = ['TN:', f'SF:{self.url}']
+        fn_hit = 0
+        names = self.function_names()
+        for fn, name in zip(self.functions, names):
+            lines.append(f"FN:{self.position(fn['ranges'][0]['startOffset'])[0]},{name}")
+        for fn, name in zip(self.functions, names):
+            count = fn['ranges'][0]['count']
+            fn_hit += count > 0
+            lines.append(f'FNDA:{count},{name}')
+        lines.append(f'FNF:{len(self.functions)}')
+        lines.append(f'FNH:{fn_hit}')
+        branches = branch_hit = 0
+        for i, fn in enumerate(self.functions):
+            for j, block in enumerate(fn['ranges'][1:]):
+                branches += 1
+                branch_hit += block['count'] > 0
+                # "-"表示所在代码没有执行过，v8给出的代码块都有执行次数，没执行的是0
+                line = self.position(block['startOffset'])[0]
+                lines.append(f"BRDA:{line},{i},{j},{block['count']}")
+        lines.append(f'BRF:{branches}')
+        lines.append(f'BRH:{branch_hit}')
+        line_counts = self.line_counts()
+        for line, count in sorted(line_counts.items()):
+            lines.append(f'DA:{line},{count}')
+        lines.append(f'LF:{len(line_counts)}')
+        lines.append(f'LH:{sum(1 for c in line_counts.values() if c > 0)}')
+        lines.append('end_of_record')
+        return '\n'.join(lines) + '\n'
+
+
+class CoverageReport:
+    def __init__(self, scripts):
+        self.scripts = scripts
+
+    def __iter__(self):
+        return iter(self.scripts)
+
+    def __len__(self):
+        return len(self.scripts)
+
+    def to_istanbul(self):
+        """Istanbul格式的覆盖率，可以保存为coverage-final.json交给nyc/istanbul生成报告"""
+        return {script.url: script.to_istanbul() for script in self.scripts}
+
+    def save_istanbul(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_istanbul(), f)
+        return path
+
+    def to_lcov(self):
+        return ''.join(script.to_lcov() for script in self.scripts)
+
+    def save_lcov(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_lcov())
+        return path
+
+
+class Coverage:
+    """
+    通过进程内的inspector会话收集v8代码覆盖率，不需要devtools
+    """
+
+    def __init__(self, context):
+        self.session = InspectorSession(context)
+        self.precise = True
+
+    def start(self, precise=True, call_counts=True, detailed=True):
+        """
+        precise:     精确覆盖率，关闭时使用v8的best-effort覆盖率(只有函数级别且可能被gc影响)
+        call_counts: 记录执行次数，关闭时只记录是否执行
+        detailed:    记录代码块级别的覆盖率
+        """
+        self.precise = precise
+        self.session.call('Profiler.enable')
+        # 获取脚本源码需要开启Debugger，跳过所有断点避免debugger语句暂停执行
+        self.session.call('Debugger.enable')
+        self.session.call('Debugger.setSkipAllPauses', skip=True)
+        if precise:
+            self.session.call('Profiler.startPreciseCoverage', callCount=call_counts, detailed=detailed)
+
+    def take(self, include_anonymous=False):
+        """返回CoverageReport；默认跳过没有url的脚本(例如exec_js时没有指定文件名)"""
+        if self.precise:
+            result = self.session.call('Profiler.takePreciseCoverage')['result']
+        else:
+            result = self.session.call('Profiler.getBestEffortCoverage')['result']
+        scripts = []
+        for script in result:
+            if not script['url'] and not include_anonymous:
+                continue
+            source = self.session.call('Debugger.getScriptSource', scriptId=script['scriptId'])['scriptSource']
+            scripts.append(ScriptCoverage(script['scriptId'], script['url'] or f"script-{script['scriptId']}",
+                                          source, script['functions']))
+        return CoverageReport(scripts)
+
+    def stop(self):
+        if self.precise:
+            self.session.call('Profiler.stopPreciseCoverage')
+        self.session.call('Debugger.disable')
+        self.session.call('Profiler.disable')
+
+
+def start_coverage(context, precise=True, call_counts=True, detailed=True):
+    """开始收集覆盖率，返回的Coverage传给take_coverage"""
+    coverage = Coverage(context)
+    coverage.start(precise, call_counts, detailed)
+    return coverage
+
+
+def take_coverage(coverage, include_anonymous=False):
+    return coverage.take(include_anonymous)
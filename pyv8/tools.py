@@ -1,5 +1,6 @@
-from functools import wraps
+from functools import partial, wraps
 from .flag import *
+from .trace import HookFilter
 
 __hook_exclude_name = (
     "dir", "dirxml", "profile", "profileEnd", "clear", "table", "keys", "values",
@@ -11,29 +12,64 @@ __hook_exclude_name = (
     "faker",  "unescape", "NaN", "Infinity", "_cf_chl_opt", "decodeURIComponent"
 )
 
+# 默认hook使用的过滤器: getter排除常用的内置对象，setter只排除混淆变量，method/construct全部记录
+# 可以直接修改其中的set，或者用set_hook_filter替换
+hook_filters = {
+    'get': HookFilter(exclude=__hook_exclude_name, exclude_prefix=('a1_0x',)),
+    'set': HookFilter(exclude_prefix=('a1_0x',)),
+    'method': HookFilter(),
+    'construct': HookFilter(),
+}
+
+# 设置了tracer后，默认hook把事件记录到tracer中，不再print
+hook_tracer = None
+
+
+def set_hook_filter(flt, op=None):
+    """op为None时所有hook都使用flt，否则只替换'get'/'set'/'method'/'construct'中的一个"""
+    for key in (hook_filters if op is None else (op,)):
+        hook_filters[key] = flt
+
+
+def set_hook_tracer(tracer):
+    global hook_tracer
+    hook_tracer = tracer
+
 
 def __v8_get_hook__(self, name, value=None, error=None, ctx_type=''):
-    if name in __hook_exclude_name:
+    cls_name = self.__class__.__name__
+    if not getattr(self, '_pyv8_hook_filter', hook_filters['get']).match(cls_name, name):
         return
-    if isinstance(name, str) and name.startswith('a1_0x'):
+    if hook_tracer is not None:
+        hook_tracer.record('error' if error else 'get', ctx_type, cls_name, name, error or value)
         return
-    msg = f"{ctx_type} getter: {self.__class__.__name__}.{name} -> {value}"
+    msg = f"{ctx_type} getter: {cls_name}.{name} -> {value}"
     if error:
         msg += f", error: {error}"
     print(msg)
 
 
 def __v8_set_hook__(self, name, value, error, ctx_type=''):
-    if isinstance(name, str) and name.startswith('a1_0x'):
+    cls_name = self.__class__.__name__
+    if not getattr(self, '_pyv8_hook_filter', hook_filters['set']).match(cls_name, name):
         return
-    msg = f"{ctx_type} setter: {self.__class__.__name__}.{name} = {value}"
+    if hook_tracer is not None:
+        hook_tracer.record('error' if error else 'set', ctx_type, cls_name, name, error or value)
+        return
+    msg = f"{ctx_type} setter: {cls_name}.{name} = {value}"
     if error:
         msg += f", error: {error}"
     print(msg)
 
 
 def __v8_method_hook__(self, func_name, arguments, value, has_error, ctx_type=''):
-    msg = f"{ctx_type} method: {self.__name__ if isinstance(self, type) else self.__class__.__name__}.{func_name}{tuple(arguments)}"
+    cls_name = self.__name__ if isinstance(self, type) else self.__class__.__name__
+    if not getattr(self, '_pyv8_hook_filter', hook_filters['method']).match(cls_name, func_name):
+        return
+    if hook_tracer is not None:
+        hook_tracer.record('error' if has_error else 'method', ctx_type, cls_name, func_name, value)
+        return
+    msg = f"{ctx_type} method: {cls_name}.{func_name}{tuple(arguments)}"
     if has_error:
         msg += f" -> error: {value}"
     else:
@@ -41,7 +77,15 @@ def __v8_method_hook__(self, func_name, arguments, value, has_error, ctx_type=''
     print(msg)
 
 
-def __v8_construct_hook__(name, arguments, value, has_error, is_construct_call, ctx_type=''):
+def __v8_construct_hook__(name, arguments, value, has_error, is_construct_call, ctx_type='',
+                          hook_filter=None):
+    # 构造hook不传入类本身，类上的过滤器由ConstructorConfig通过hook_filter绑定
+    if not (hook_filter or hook_filters['construct']).match(name, 'constructor'):
+        return
+    if hook_tracer is not None:
+        op = 'error' if has_error else 'new' if is_construct_call else 'call'
+        hook_tracer.record(op, ctx_type, name, 'constructor', value)
+        return
     if is_construct_call:
         msg = f"{ctx_type} construct: new {name}{tuple(arguments)} -> {value}"
     else:
@@ -62,6 +106,7 @@ class ConstructorConfig:
             immutable=0,
             has_constructor=1,
             hook=True,
+            hook_filter=None,  # HookFilter, 只对这个类的默认hook生效，替代全局的hook_filters
     ):
         self.exposed = exposed
         self.constructor = constructor
@@ -70,6 +115,7 @@ class ConstructorConfig:
         self.v8_array = v8_array
         self.immutable = immutable
         self.has_constructor = has_constructor
+        self.hook_filter = hook_filter
 
     def __call__(self, cls):
         if self.exposed == FlagExposed.kYes:
@@ -84,6 +130,11 @@ class ConstructorConfig:
             cls.__v8_set_hook__ = __v8_set_hook__
             cls.__v8_method_hook__ = __v8_method_hook__
             cls.__v8_construct_hook__ = __v8_construct_hook__
+        if self.hook_filter is not None:
+            cls._pyv8_hook_filter = self.hook_filter
+            if self.hook:
+                cls.__v8_construct_hook__ = partial(
+                    __v8_construct_hook__, hook_filter=self.hook_filter)
         return cls
 
     def __str__(self):
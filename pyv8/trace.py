@@ -0,0 +1,111 @@
+import json
+import time
+from collections import namedtuple
+
+HookEvent = namedtuple('HookEvent', ['op', 'ctx_type', 'cls', 'name', 'value_type', 'ts'])
+
+
+class HookFilter:
+    """
+    hook事件过滤器，全部基于set/tuple查询
+
+    exclude:         不记录的属性名
+    include:         不为空时只记录这些属性名
+    exclude_prefix:  不记录以这些前缀开头的属性名，例如混淆代码中的 'a1_0x'
+    include_prefix:  不为空时只记录以这些前缀开头的属性名
+    classes:         不为空时只记录这些类的事件
+    exclude_classes: 不记录这些类的事件
+    """
+
+    def __init__(self, exclude=(), include=(), exclude_prefix=(), include_prefix=(),
+                 classes=(), exclude_classes=()):
+        self.exclude = set(exclude)
+        self.include = set(include)
+        self.exclude_prefix = tuple(exclude_prefix)
+        self.include_prefix = tuple(include_prefix)
+        self.classes = set(classes)
+        self.exclude_classes = set(exclude_classes)
+
+    def match(self, cls_name, name):
+        if self.classes and cls_name not in self.classes:
+            return False
+        if cls_name in self.exclude_classes:
+            return False
+        if not isinstance(name, str):
+            return not self.include and not self.include_prefix
+        if name in self.exclude:
+            return False
+        if self.include and name not in self.include:
+            return False
+        if self.exclude_prefix and name.startswith(self.exclude_prefix):
+            return False
+        if self.include_prefix and not name.startswith(self.include_prefix):
+            return False
+        return True
+
+
+class HookTracer:
+    """
+    把hook事件记录到预分配的环形缓冲区中，缓冲区满时覆盖最旧的事件(dropped计数)
+
+    sample:     每sample个事件记录一个
+    callback:   缓冲区中累计batch_size个事件时调用callback(events)
+    """
+
+    def __init__(self, capacity=65536, sample=1, callback=None, batch_size=1024):
+        self.capacity = capacity
+        self.sample = sample
+        self.callback = callback
+        self.batch_size = min(batch_size, capacity)
+        self.dropped = 0
+        self.seen = 0
+        self._buf = [None] * capacity
+        self._start = 0
+        self._count = 0
+
+    def record(self, op, ctx_type, cls_name, name, value):
+        self.seen += 1
+        if self.sample > 1 and self.seen % self.sample:
+            return
+        end = (self._start + self._count) % self.capacity
+        self._buf[end] = (op, ctx_type, cls_name, name, type(value).__name__, time.perf_counter_ns())
+        if self._count == self.capacity:
+            self._start = (self._start + 1) % self.capacity
+            self.dropped += 1
+        else:
+            self._count += 1
+        if self.callback is not None and self._count >= self.batch_size:
+            self.callback(self.drain())
+
+    def drain(self, max_events=None):
+        n = self._count if max_events is None else min(max_events, self._count)
+        buf, cap, start = self._buf, self.capacity, self._start
+        events = []
+        for i in range(n):
+            idx = (start + i) % cap
+            events.append(HookEvent(*buf[idx]))
+            buf[idx] = None
+        self._start = (start + n) % cap
+        self._count -= n
+        return events
+
+    def drain_to_jsonl(self, fp):
+        """把缓冲区中的事件以JSONL格式写入文件(路径或文件对象)，返回写入的事件数"""
+        events = self.drain()
+        if isinstance(fp, str):
+            with open(fp, 'a', encoding='utf-8') as f:
+                return self._write_jsonl(f, events)
+        return self._write_jsonl(fp, events)
+
+    @staticmethod
+    def _write_jsonl(f, events):
+        dumps = json.dumps
+        f.writelines(dumps(e._asdict(), ensure_ascii=False, default=str) + '\n' for e in events)
+        return len(events)
+
+    def flush(self):
+        if self.callback is not None and self._count:
+            self.callback(self.drain())
+
+    def __len__(self):
+        return self._count
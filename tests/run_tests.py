@@ -25,6 +25,12 @@ def run_unittest():
     from tests.test_conversion import TestConversion
     from tests.test_faker import TestFaker
     from tests.test_multiple_context import TestMultipleContext
+    from tests.test_pool import TestContextPool
+    from tests.test_trace import TestTrace
+    from tests.test_process import TestProcessPool
+    from tests.test_inspector import TestInspector, TestDevToolsServer
+    from tests.test_profiler import TestProfiler
+    from tests.test_interop import TestInterop
 
     # 创建测试套件
     test_suite = unittest.TestSuite()
@@ -41,7 +47,14 @@ def run_unittest():
         TestException,
         TestConversion,
         TestFaker,
-        TestMultipleContext
+        TestMultipleContext,
+        TestContextPool,
+        TestTrace,
+        TestProcessPool,
+        TestInspector,
+        TestDevToolsServer,
+        TestProfiler,
+        TestInterop,
     ]
 
     for test_class in test_classes:
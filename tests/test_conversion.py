@@ -188,5 +188,98 @@ class TestConversion(unittest.TestCase):
         test_result = self.context.exec_js("(function(re) { return re.test('Hello World'); })")(js_regexp)
         self.assertTrue(test_result)
 
+    def test_deep_convert(self):
+        """测试js对象图一次性转换为python对象"""
+        result = pyv8.deep_convert(self.context, self.context.exec_js("""
+            ({
+                array: [1, 2.5, 'three', null, undefined],
+                object: {a: {b: {c: true}}},
+                date: new Date(Date.UTC(2023, 0, 1)),
+                map: new Map([['k', 1]]),
+                set: new Set([1, 2]),
+                bytes: new Uint8Array([0, 1, 255]),
+                big: 2n ** 64n,
+            })
+        """))
+        self.assertEqual(result["array"], [1, 2.5, "three", None, None])
+        self.assertEqual(result["object"], {"a": {"b": {"c": True}}})
+        self.assertEqual(result["date"].year, 2023)
+        self.assertEqual(result["map"], {"k": 1})
+        self.assertEqual(result["set"], {1, 2})
+        self.assertEqual(result["bytes"], b"\x00\x01\xff")
+        self.assertEqual(result["big"], 2 ** 64)
+
+        # 原始类型原样返回
+        self.assertEqual(pyv8.deep_convert(self.context, 1), 1)
+
+    def test_deep_convert_cycle_and_depth(self):
+        """测试循环引用和深度限制"""
+        result = pyv8.deep_convert(self.context, self.context.exec_js("""
+            var o = {name: 'root', children: [{name: 'child'}]};
+            o.children[0].parent = o;
+            o.self = o;
+            o
+        """))
+        self.assertIs(result["self"], result)
+        self.assertIs(result["children"][0]["parent"], result)
+
+        # Set元素和Map的key中的循环引用无法还原，转换为None
+        result = pyv8.deep_convert(self.context, self.context.exec_js("""
+            var s = new Set(); s.add(s);
+            var o = {set: new Set([1]), keys: new Map([[1, 'a']]), values: new Map([['k', 1]])};
+            o.set.add(o); o.keys.set(o, 'b'); o.values.set('self', o);
+            [s, o]
+        """))
+        self.assertEqual(result[0], {None})
+        self.assertEqual(result[1]["set"], {1, None})
+        self.assertEqual(result[1]["keys"], {1: 'a', None: 'b'})
+        self.assertIs(result[1]["values"]["self"], result[1])
+
+        result = pyv8.deep_convert(self.context, self.context.exec_js("({a: {b: {c: 1}}, d: 1})"), depth=2)
+        self.assertEqual(result, {"a": {"b": None}, "d": 1})
+
+    def test_to_js(self):
+        """测试python对象一次性转换为js对象"""
+        self.context.big = pyv8.to_js(self.context, {
+            "list": list(range(1000)),
+            "nested": {"a": [{"x": 1}]},
+            "bytes": b"\x01\x02",
+            "tags": {"a"},
+        })
+        self.assertEqual(self.context.exec_js("big.list.length"), 1000)
+        self.assertEqual(self.context.exec_js("big.nested.a[0].x"), 1)
+        self.assertEqual(self.context.exec_js("big.bytes instanceof Uint8Array && big.bytes[1]"), 2)
+        self.assertEqual(self.context.exec_js("big.tags.has('a')"), True)
+
+    def test_lazy(self):
+        """测试惰性暴露python dict"""
+        cfg = pyv8.lazy({
+            "navigator": {"userAgent": "pyv8", "languages": ["zh-CN", "en"]},
+            "screen": {"width": 1920, "height": 1080},
+            "plugins": [{"name": "pdf"}],
+            "opener": None,
+        })
+        self.context.expose(cfg=cfg)
+        self.assertEqual(self.context.exec_js("cfg.navigator.userAgent"), "pyv8")
+        self.assertEqual(self.context.exec_js("cfg.screen.width"), 1920)
+        self.assertEqual(self.context.exec_js("cfg.navigator.languages.length"), 2)
+        self.assertEqual(self.context.exec_js("cfg.plugins[0].name"), "pdf")
+        self.assertEqual(self.context.exec_js("cfg.navigator === cfg.navigator"), True)
+        self.assertEqual(self.context.exec_js("cfg.plugins === cfg.plugins"), True)
+        self.assertEqual(self.context.exec_js("cfg.missing"), pyv8.Undefined)
+        # 和直接expose一样，值为None的key在js中是null
+        self.assertEqual(self.context.exec_js("cfg.opener === null"), True)
+
+        # 同一个对象暴露给另一个context时，数组属于各自的realm
+        class Window: pass
+        other = pyv8.Context(Window())
+        other.expose(cfg=cfg)
+        self.assertEqual(other.exec_js("cfg.plugins instanceof Array"), True)
+        self.assertEqual(other.exec_js("cfg.plugins === cfg.plugins"), True)
+        self.assertEqual(self.context.exec_js("cfg.plugins instanceof Array"), True)
+
+        with self.assertRaises(TypeError):
+            pyv8.lazy([1, 2])
+
 if __name__ == "__main__":
     unittest.main()
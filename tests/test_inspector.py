@@ -0,0 +1,212 @@
+import base64
+import json
+import os
+import select
+import socket
+import struct
+import threading
+import time
+import unittest
+import urllib.request
+import pyv8
+
+
+class TestInspector(unittest.TestCase):
+    """测试进程内的inspector会话"""
+
+    def setUp(self):
+        """每个测试前创建一个新的上下文"""
+        class Window: pass
+        self.context = pyv8.Context(Window())
+
+    def tearDown(self):
+        """测试结束后清理上下文"""
+        del self.context
+
+    def test_call(self):
+        """测试同步调用inspector协议"""
+        session = pyv8.InspectorSession(self.context)
+        result = session.call('Runtime.evaluate', expression='1 + 2', returnByValue=True)
+        self.assertEqual(result['result']['value'], 3)
+
+        with self.assertRaises(pyv8.InspectorError):
+            session.call('NoSuch.method')
+
+        # 其他线程只能用send
+        errors = []
+
+        def call_from_thread():
+            try:
+                session.call('Runtime.evaluate', expression='1')
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=call_from_thread)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(session._futures, {})
+
+    def test_send_and_events(self):
+        """测试send返回Future以及事件回调"""
+        session = pyv8.InspectorSession(self.context)
+        messages = []
+        session.on('Runtime.consoleAPICalled', lambda params: messages.append(params['args'][0]['value']))
+        future = session.send('Runtime.enable')
+        self.assertTrue(future.done())
+        self.context.exec_js("console.log('hello')")
+        self.assertEqual(messages, ['hello'])
+
+    def test_pause(self):
+        """测试在断点暂停时通过其他线程检查变量并恢复执行"""
+        session = pyv8.InspectorSession(self.context)
+        session.call('Debugger.enable')
+        values = []
+
+        def on_paused(params):
+            frame_id = params['callFrames'][0]['callFrameId']
+
+            def inspect():
+                result = session.send('Debugger.evaluateOnCallFrame', {
+                    'callFrameId': frame_id, 'expression': 'x', 'returnByValue': True,
+                }).result(5)
+                values.append(result['result']['value'])
+                session.send('Debugger.resume')
+
+            threading.Thread(target=inspect).start()
+
+        session.on('Debugger.paused', on_paused)
+        result = self.context.exec_js("var x = 41; debugger; x + 1")
+        self.assertEqual(result, 42)
+        self.assertEqual(values, [41])
+        self.assertFalse(session.paused)
+
+    def test_heap_statistics(self):
+        """测试获取堆使用情况"""
+        before = pyv8.heap_statistics(self.context)
+        self.assertGreater(before['used_size'], 0)
+        self.assertGreaterEqual(before['total_size'], before['used_size'])
+
+        self.context.exec_js("var big = new Array(1000000).fill(1.5);")
+        after = pyv8.heap_statistics(self.context)
+        self.assertGreater(after['used_size'], before['used_size'])
+
+        # 复用同一个会话多次采集
+        session = pyv8.InspectorSession(self.context)
+        try:
+            for _ in range(3):
+                self.assertGreater(pyv8.heap_statistics(self.context, session)['used_size'], 0)
+        finally:
+            session.close()
+
+
+class TestDevToolsServer(unittest.TestCase):
+    """测试基于asyncio的devtools服务"""
+
+    def setUp(self):
+        class Window: pass
+        self.contexts = [pyv8.Context(Window()), pyv8.Context(Window())]
+        self.server = pyv8.DevToolsServer(port=0).start()
+        self.targets = [self.server.add_target(ctx, url=f'https://{i}.test/') for i, ctx in enumerate(self.contexts)]
+
+    def tearDown(self):
+        self.server.stop()
+        del self.contexts
+
+    def get_json(self, path):
+        return json.loads(urllib.request.urlopen(f'http://127.0.0.1:{self.server.port}{path}').read())
+
+    def connect(self, target, host='localhost'):
+        sock = socket.create_connection(('127.0.0.1', self.server.port))
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall(
+            f'GET /{target.id} HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\n'
+            f'Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n'.encode()
+        )
+        return sock, sock.recv(1024).split(b'\r\n')[0]
+
+    @staticmethod
+    def ws_send(sock, message):
+        payload = json.dumps(message).encode()
+        mask = os.urandom(4)
+        header = struct.pack('!BBH', 0x81, 0x80 | 126, len(payload))
+        sock.sendall(header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload)))
+
+    @staticmethod
+    def ws_recv(sock):
+        b1, b2 = sock.recv(2)
+        length = b2 & 0x7f
+        if length == 126:
+            length, = struct.unpack('!H', sock.recv(2))
+        elif length == 127:
+            length, = struct.unpack('!Q', sock.recv(8))
+        data = b''
+        while len(data) < length:
+            data += sock.recv(length - len(data))
+        return json.loads(data)
+
+    def pump_until_readable(self, sock, timeout=5):
+        # 在当前线程处理devtools发来的消息，直到sock收到响应
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.server.pump()
+            if select.select([sock], [], [], 0.01)[0]:
+                return
+        self.fail('devtools server did not respond')
+
+    def test_discovery(self):
+        """测试/json/list和/json/version"""
+        targets = self.get_json('/json/list')
+        self.assertEqual({t['id'] for t in targets}, {t.id for t in self.targets})
+        self.assertTrue(all(t['webSocketDebuggerUrl'].startswith('ws://') for t in targets))
+        self.assertIn('Browser', self.get_json('/json/version'))
+
+    def test_sessions(self):
+        """测试多个target同时连接，同一个target只能连接一次"""
+        sock1, status1 = self.connect(self.targets[0])
+        sock2, status2 = self.connect(self.targets[1])
+        self.assertIn(b'101', status1)
+        self.assertIn(b'101', status2)
+        sock3, status3 = self.connect(self.targets[0])
+        sock3.close()
+        self.assertIn(b'409', status3)
+
+        self.contexts[0].exec_js("var who = 'first'")
+        self.contexts[1].exec_js("var who = 'second'")
+        for sock in (sock1, sock2):
+            self.ws_send(sock, {'id': 1, 'method': 'Runtime.evaluate', 'params': {'expression': 'who'}})
+        self.pump_until_readable(sock1)
+        self.assertEqual(self.ws_recv(sock1)['result']['result']['value'], 'first')
+        self.pump_until_readable(sock2)
+        self.assertEqual(self.ws_recv(sock2)['result']['result']['value'], 'second')
+        sock1.close()
+        sock2.close()
+
+    def test_host_check(self):
+        """测试拒绝Host不是ip地址或localhost的请求(DNS rebinding)"""
+        sock, status = self.connect(self.targets[0], host='evil.example:9229')
+        sock.close()
+        self.assertIn(b'400', status)
+        sock, status = self.connect(self.targets[0], host=f'[::1]:{self.server.port}')
+        sock.close()
+        self.assertIn(b'101', status)
+
+    def test_bad_websocket_request(self):
+        """测试缺少Sec-WebSocket-Key的请求和超过大小限制的消息"""
+        sock = socket.create_connection(('127.0.0.1', self.server.port))
+        sock.sendall(f'GET /{self.targets[0].id} HTTP/1.1\r\nHost: localhost\r\n'
+                     f'Upgrade: websocket\r\nConnection: Upgrade\r\n\r\n'.encode())
+        self.assertIn(b'400', sock.recv(1024).split(b'\r\n')[0])
+        sock.close()
+
+        self.server.max_message_size = 16
+        sock, status = self.connect(self.targets[0])
+        self.assertIn(b'101', status)
+        self.ws_send(sock, {'id': 1, 'method': 'Runtime.evaluate', 'params': {'expression': '1'}})
+        # 服务端回复close帧，状态码1009
+        self.assertEqual(sock.recv(4), b'\x88\x02\x03\xf1')
+        sock.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
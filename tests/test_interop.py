@@ -0,0 +1,113 @@
+import unittest
+import pyv8
+
+
+class TestInterop(unittest.TestCase):
+    """测试python回调的耗时统计"""
+
+    def setUp(self):
+        """每个测试前创建一个新的上下文"""
+        class Window: pass
+        self.context = pyv8.Context(Window())
+        pyv8.reset_interop_stats()
+
+    def tearDown(self):
+        """测试结束后清理上下文"""
+        del self.context
+        pyv8.reset_interop_stats()
+
+    def test_instrument(self):
+        """测试方法和属性回调的统计"""
+        class Calculator:
+            __v8_constructor__ = 2
+            __v8_method__ = (
+                ("add", "fn_add", 0, 0, 0, 0, 0, 0, 0),
+            )
+            __v8_attribute__ = (
+                ("x", "get_x", "set_x", 0, 0, 0, 0, 1, 0, 1),
+            )
+
+            def __init__(self, win=None):
+                self._x = 0
+
+            def fn_add(self, a, b, **kw):
+                return a + b
+
+            def get_x(self):
+                return self._x
+
+            def set_x(self, value):
+                self._x = value
+
+        pyv8.instrument(Calculator)
+        self.context.expose(Calculator)
+        result = self.context.exec_js("""
+            var obj = new Calculator();
+            for (var i = 0; i < 10; i++) obj.add(i, 1);
+            obj.x = 5;
+            obj.x
+        """)
+        self.assertEqual(result, 5)
+
+        stats = pyv8.interop_stats()
+        self.assertEqual(stats["Calculator.add"]["count"], 10)
+        self.assertEqual(sum(stats["Calculator.add"]["histogram_us"].values()), 10)
+        self.assertEqual(stats["Calculator.x get"]["count"], 1)
+        self.assertEqual(stats["Calculator.x set"]["count"], 1)
+
+        pyv8.reset_interop_stats()
+        self.assertEqual(pyv8.interop_stats(), {})
+
+        # reset之后的调用继续计入统计
+        self.context.exec_js("obj.add(1, 2); obj.add(3, 4);")
+        stats = pyv8.interop_stats()
+        self.assertEqual(list(stats), ["Calculator.add"])
+        self.assertEqual(stats["Calculator.add"]["count"], 2)
+
+        pyv8.uninstrument(Calculator)
+        self.assertFalse(hasattr(Calculator.fn_add, '__v8_instrumented__'))
+
+    def test_separate_stats(self):
+        """测试使用单独的统计对象"""
+        class Document:
+            __v8_method__ = (
+                ("createElement", "fn_createElement", 1, 0, 1, 0, 0, 0, 0),
+            )
+
+            def fn_createElement(self, name):
+                raise ValueError(name)
+
+        stats = pyv8.InteropStats()
+        pyv8.instrument(Document, stats)
+        self.context.expose(document=Document())
+        with self.assertRaises(pyv8.JSException):
+            self.context.exec_js("document.createElement('div')")
+        self.assertEqual(stats.snapshot()["Document.createElement"]["errors"], 1)
+        self.assertEqual(pyv8.interop_stats(), {})
+
+        # 统计对象绑定在类上，不能同时instrument到另一个统计对象
+        pyv8.instrument(Document, stats)
+        with self.assertRaises(ValueError):
+            pyv8.instrument(Document)
+        pyv8.uninstrument(Document)
+        pyv8.instrument(Document)
+        pyv8.uninstrument(Document)
+
+        # 父类已经instrument到其他统计对象时，子类的回调也保持不变
+        class HTMLDocument(Document):
+            __v8_method__ = (
+                ("open", "fn_open", 1, 0, 0, 0, 0, 0, 0),
+            )
+
+            def fn_open(self):
+                return self
+
+        pyv8.instrument(Document, stats)
+        with self.assertRaises(ValueError):
+            pyv8.instrument(HTMLDocument)
+        self.assertFalse(hasattr(HTMLDocument.fn_open, '__v8_instrumented__'))
+        pyv8.uninstrument(Document)
+
+
+if __name__ == "__main__":
+    unittest.main()
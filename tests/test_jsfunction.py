@@ -113,5 +113,51 @@ class TestJSFunction(unittest.TestCase):
         self.assertEqual(list(result['array']), [1, 2, 3])
         self.assertEqual(result['object']['key'], "value")
 
+    def test_call_many(self):
+        """测试批量调用JavaScript函数"""
+        sign = self.context.exec_js("function sign(a, b) { return a + '_' + b; }; sign")
+        result = pyv8.call_many(sign, [(i, 'x') for i in range(10000)], chunk_size=3000,
+                                context=self.context)
+        self.assertEqual(result, [f"{i}_x" for i in range(10000)])
+
+        # 返回值不是简单类型时逐个转换
+        make = self.context.exec_js("(function (a) { return {a: a}; })")
+        result = pyv8.call_many(make, [1, 2], context=self.context)
+        self.assertEqual([r['a'] for r in result], [1, 2])
+
+        # 指定this
+        get_x = self.context.exec_js("(function (n) { return this.x * n; })")
+        obj = self.context.exec_js("({x: 3})")
+        self.assertEqual(pyv8.call_many(get_x, [(1,), (2,)], receiver=obj,
+                                        context=self.context), [3, 6])
+
+        # async/generator函数
+        fetch = self.context.exec_js("(async function (a) { return a; })")
+        result = pyv8.call_many(fetch, [1, 2], context=self.context)
+        self.assertEqual(len(result), 2)
+        self.assertIsInstance(result[0], pyv8.JSPromise)
+        gen = self.context.exec_js("(function* (a) { yield a; })")
+        result = pyv8.call_many(gen, [1, 2], context=self.context)
+        self.assertEqual([g.next().value for g in result], [1, 2])
+
+        # 页面脚本改写了Function.prototype.constructor也不影响
+        self.context.exec_js("""
+            Object.defineProperty(Function.prototype, 'constructor', {
+                get: function () { throw new Error('anti debug'); }
+            });
+        """)
+        self.assertEqual(pyv8.call_many(sign, [(1, 'y')], context=self.context), ['1_y'])
+
+    def test_call_many_iter(self):
+        """测试流式批量调用"""
+        double = self.context.exec_js("(function (a) { return a * 2; })")
+        it = pyv8.call_many_iter(double, iter(range(5)), chunk_size=2, context=self.context)
+        self.assertEqual(next(it), 0)
+        self.assertEqual(list(it), [2, 4, 6, 8])
+
+        throw = self.context.exec_js("(function () { throw new Error('Test error'); })")
+        with self.assertRaises(pyv8.JSException):
+            pyv8.call_many(throw, [()], context=self.context)
+
 if __name__ == "__main__":
     unittest.main()
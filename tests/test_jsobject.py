@@ -180,5 +180,23 @@ class TestJSObject(unittest.TestCase):
         self.assertEqual(js_obj.get_name(), "xiaoming")
         self.assertEqual(js_obj.get_age(), 18)
 
+    def test_bind_method(self):
+        """测试绑定receiver的方法调用"""
+        js_obj = self.context.exec_js("""
+            ({
+                count: 0,
+                inc: function (n) { this.count += n; return this.count; },
+                name: 'test',
+            })
+        """)
+        inc = pyv8.bind_method(js_obj, "inc")
+        self.assertIsInstance(inc, pyv8.JSFunction)
+        for i in range(1, 101):
+            self.assertEqual(inc(1), i)
+        self.assertEqual(js_obj.count, 100)
+
+        with self.assertRaises(TypeError):
+            pyv8.bind_method(js_obj, "name")
+
 if __name__ == "__main__":
     unittest.main()
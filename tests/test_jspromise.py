@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 import pyv8
 import time
@@ -35,5 +36,50 @@ class TestJSPromise(unittest.TestCase):
         """)
         promise.then(callback)
 
+    def test_await_promise(self):
+        """测试await已经resolve和被reject的Promise"""
+        async def main():
+            result = await pyv8.as_future(self.context.exec_js("Promise.resolve(42)"))
+            self.assertEqual(result, 42)
+            with self.assertRaises(pyv8.JSException):
+                await pyv8.as_future(self.context.exec_js("Promise.reject(new Error('fail'))"))
+
+        asyncio.run(main())
+
+    def test_asyncio_timers(self):
+        """测试由事件循环驱动的setTimeout/setInterval"""
+        async def main():
+            timers = pyv8.asyncio_loop_integration(self.context)
+            promise = self.context.exec_js("""
+                var ticks = 0;
+                var id = setInterval(() => { ticks += 1; if (ticks == 3) clearInterval(id); }, 1);
+                new Promise((resolve) => setTimeout(resolve, 10, 'done'));
+            """)
+            self.assertEqual(await pyv8.as_future(promise), 'done')
+            await timers.until_idle()
+            self.assertEqual(self.context.ticks, 3)
+
+            self.context.exec_js("var t = setTimeout(() => { ticks = -1 }, 1); clearTimeout(t);")
+            await asyncio.sleep(0.01)
+            self.assertEqual(self.context.ticks, 3)
+            timers.close()
+
+        asyncio.run(main())
+
+    def test_asyncio_timers_loop(self):
+        """测试不在协程中创建timer时必须传入loop"""
+        with self.assertRaises(RuntimeError):
+            pyv8.asyncio_loop_integration(self.context)
+
+        loop = asyncio.new_event_loop()
+        try:
+            timers = pyv8.asyncio_loop_integration(self.context, loop)
+            self.assertIs(timers.loop, loop)
+            self.context.exec_js("var fired = false; setTimeout(() => { fired = true }, 1);")
+            loop.run_until_complete(timers.until_idle())
+            self.assertTrue(self.context.fired)
+        finally:
+            loop.close()
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import pyv8
+
+
+class TestContextPool(unittest.TestCase):
+    """测试Context池的预热、复用和重置"""
+
+    def setUp(self):
+        class Window: pass
+
+        def setup(ctx):
+            ctx.exec_js("var patched = 1;")
+
+        self.pool = pyv8.ContextPool(Window, size=2, setup=setup)
+
+    def tearDown(self):
+        self.pool.clear()
+        del self.pool
+
+    def test_prebuilt(self):
+        """测试池子在创建时预热context"""
+        self.assertEqual(len(self.pool), 2)
+
+    def test_acquire_release(self):
+        """测试acquire/release以及命中统计"""
+        ctx = self.pool.acquire()
+        self.assertIsInstance(ctx, pyv8.Context)
+        self.assertEqual(ctx.exec_js("patched"), 1)
+        self.pool.release(ctx)
+        self.assertEqual(self.pool.stats.hits, 1)
+        self.assertEqual(self.pool.stats.resets, 1)
+
+        ctx1 = self.pool.acquire()
+        ctx2 = self.pool.acquire()
+        ctx3 = self.pool.acquire()
+        self.assertEqual(self.pool.stats.misses, 1)
+        for ctx in (ctx1, ctx2, ctx3):
+            self.pool.release(ctx)
+        self.assertEqual(len(self.pool), 2)
+
+    def test_reset(self):
+        """测试release后的context恢复到初始状态"""
+        with self.pool.context() as ctx:
+            ctx.exec_js("var dirty = 1; Array.prototype.dirty = 1;")
+
+        for _ in range(2):
+            with self.pool.context() as ctx:
+                self.assertEqual(ctx.exec_js("typeof dirty"), "undefined")
+                self.assertEqual(ctx.exec_js("typeof [].dirty"), "undefined")
+
+    def test_release_foreign_context(self):
+        """测试release不属于池子的context"""
+        class Window: pass
+        with self.assertRaises(ValueError):
+            self.pool.release(pyv8.Context(Window()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import pyv8
+
+
+def build_env():
+    class Window: pass
+
+    ctx = pyv8.Context(Window(), timeout=1)
+    ctx.exec_js("""
+        var jobs = 0;
+        function sign(a, b) { jobs += 1; return a + ':' + b; }
+        function big(n) { return new Array(n).fill('x').join(''); }
+    """)
+    return ctx
+
+
+class TestProcessPool(unittest.TestCase):
+    """测试多进程执行池"""
+
+    def setUp(self):
+        self.pool = pyv8.ProcessPool(2, init=build_env, max_jobs=3, shm_threshold=1024)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_run(self):
+        """测试执行代码和调用全局函数"""
+        self.assertEqual(self.pool.run("1 + 1"), 2)
+        self.assertEqual(self.pool.run("sign", ("a", 1)), "a:1")
+        self.assertEqual(self.pool.run("({a: [1, 2]})"), {"a": [1, 2]})
+
+    def test_shared_memory(self):
+        """测试大结果通过共享内存传递"""
+        self.assertEqual(self.pool.run("big", (4096,)), "x" * 4096)
+
+    def test_recycle(self):
+        """测试worker处理max_jobs个任务后重启"""
+        for _ in range(6):
+            self.pool.run("sign", (1, 2))
+        self.assertGreaterEqual(self.pool.restarts, 2)
+
+    def test_errors(self):
+        """测试js异常和超时后worker被重启"""
+        with self.assertRaises(pyv8.JSException):
+            self.pool.run("throw new Error('test')")
+        with self.assertRaises(pyv8.JavaScriptTerminated):
+            self.pool.run("while(true) {}")
+        self.assertEqual(self.pool.run("1 + 1"), 2)
+
+    def test_submit(self):
+        """测试submit返回Future"""
+        futures = [self.pool.submit("sign", (i, i)) for i in range(4)]
+        self.assertEqual([f.result() for f in futures], [f"{i}:{i}" for i in range(4)])
+
+
+if __name__ == "__main__":
+    unittest.main()
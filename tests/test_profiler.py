@@ -0,0 +1,197 @@
+import json
+import os
+import tempfile
+import unittest
+import pyv8
+
+
+class TestProfiler(unittest.TestCase):
+    """测试不依赖devtools的性能分析"""
+
+    def setUp(self):
+        """每个测试前创建一个新的上下文"""
+        class Window: pass
+        self.context = pyv8.Context(Window())
+
+    def tearDown(self):
+        """测试结束后清理上下文"""
+        del self.context
+
+    def test_heap_snapshot(self):
+        """测试导出堆快照"""
+        self.context.exec_js("var leak = []; for (var i = 0; i < 1000; i++) leak.push({i: i});")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'test.heapsnapshot')
+            self.assertEqual(pyv8.take_heap_snapshot(self.context, path), path)
+            with open(path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+        self.assertIn('nodes', snapshot)
+        self.assertGreater(snapshot['snapshot']['node_count'], 0)
+
+    def test_sampling_heap_profiler(self):
+        """测试采样堆分析"""
+        profiler = pyv8.start_sampling_heap_profiler(self.context, sampling_interval=1024)
+        self.context.exec_js("""
+            function allocate() {
+                var out = [];
+                for (var i = 0; i < 100000; i++) out.push({i: i});
+                return out;
+            }
+            var keep = allocate();
+        """, "alloc.js")
+        root = pyv8.stop_sampling_heap_profiler(profiler)
+        self.assertIsInstance(root, pyv8.AllocationNode)
+        self.assertGreater(root.total_size, 0)
+        names = {node.function_name for _, node in root.walk()}
+        self.assertIn('allocate', names)
+
+    def test_cpu_profile(self):
+        """测试cpu采样分析和导出"""
+        def py_callback(n):
+            return sum(range(n))
+
+        self.context.expose(py_callback=py_callback)
+        profiler = pyv8.start_cpu_profile(self.context, sampling_interval_us=100)
+        self.context.exec_js("""
+            function hot() {
+                var x = 0;
+                for (var i = 0; i < 3000000; i++) x += Math.sqrt(i);
+                return x;
+            }
+            function callPy() { for (var i = 0; i < 200; i++) py_callback(10000); }
+            hot(); callPy();
+        """, "hot.js")
+        profile = pyv8.stop_cpu_profile(profiler)
+        self.assertIsInstance(profile, pyv8.CpuProfile)
+        self.assertGreater(profile.duration, 0)
+
+        folded = profile.folded()
+        self.assertIn("hot (hot.js:", folded)
+        self.assertIn("py_callback [native]", folded)
+        for line in folded.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = profile.save(os.path.join(tmp, 'test.cpuprofile'))
+            with open(path, encoding='utf-8') as f:
+                self.assertIn('nodes', json.load(f))
+
+    def test_cpu_profile_frames(self):
+        """测试native帧和没有url的脚本的帧名"""
+        def call_frame(name, script_id, url='', line=0, column=0):
+            return {'functionName': name, 'scriptId': script_id, 'url': url,
+                    'lineNumber': line, 'columnNumber': column}
+
+        profile = pyv8.CpuProfile({
+            'nodes': [
+                {'id': 1, 'callFrame': call_frame('(root)', '0'), 'children': [2]},
+                {'id': 2, 'callFrame': call_frame('main', '7', line=2), 'children': [3]},
+                {'id': 3, 'callFrame': call_frame('py_callback', '0'), 'children': [4]},
+                {'id': 4, 'callFrame': call_frame('cb', '8', 'cb.js', 0)},
+            ],
+            'startTime': 0, 'endTime': 10, 'samples': [3, 4, 4],
+        })
+        self.assertEqual(profile.stack(4),
+                         ['main ((script-7):3)', 'py_callback [native]', 'cb (cb.js:1)'])
+        self.assertEqual(profile.folded(), (
+            "main ((script-7):3);py_callback [native] 1\n"
+            "main ((script-7):3);py_callback [native];cb (cb.js:1) 2\n"
+        ))
+
+    def test_cpu_profile_anonymous(self):
+        """测试匿名函数按位置区分，v8的特殊节点保持原名"""
+        def node(node_id, name, script_id, line=0, column=0, children=()):
+            call_frame = {'functionName': name, 'scriptId': script_id, 'url': 'a.js',
+                          'lineNumber': line, 'columnNumber': column}
+            return {'id': node_id, 'callFrame': call_frame, 'children': list(children)}
+
+        profile = pyv8.CpuProfile({
+            'nodes': [
+                node(1, '(root)', '0', children=[2, 3, 4]),
+                node(2, '', '5', 10, 4),
+                node(3, '', '5', 99, 0),
+                node(4, '(garbage collector)', '0'),
+            ],
+            'startTime': 0, 'endTime': 10, 'samples': [2, 3, 3, 4],
+        })
+        self.assertEqual(profile.folded(), (
+            "(anonymous) (a.js:100:1) 2\n"
+            "(anonymous) (a.js:11:5) 1\n"
+            "(garbage collector) 1\n"
+        ))
+
+    def test_coverage(self):
+        """测试收集精确覆盖率并导出"""
+        coverage = pyv8.start_coverage(self.context, precise=True, call_counts=True)
+        self.context.exec_js("""
+            function used(x) {
+                if (x > 100) {
+                    return 'big';
+                }
+                return 'small';
+            }
+            function unused() { return 1; }
+            for (var i = 0; i < 5; i++) used(i);
+            debugger;
+        """, "cov.js")
+        report = pyv8.take_coverage(coverage)
+        coverage.stop()
+
+        scripts = {script.url: script for script in report}
+        self.assertIn("cov.js", scripts)
+        functions = {fn['functionName']: fn for fn in scripts["cov.js"].functions}
+        self.assertEqual(functions['used']['ranges'][0]['count'], 5)
+        self.assertEqual(functions['unused']['ranges'][0]['count'], 0)
+
+        istanbul = report.to_istanbul()["cov.js"]
+        self.assertIn(5, istanbul['f'].values())
+        self.assertIn([0], istanbul['b'].values())
+
+        lcov = report.to_lcov()
+        self.assertIn("SF:cov.js", lcov)
+        self.assertIn("FNDA:5,used", lcov)
+        self.assertIn("FNDA:0,unused", lcov)
+        self.assertTrue(lcov.endswith("end_of_record\n"))
+
+    def test_coverage_line_counts(self):
+        """测试按行统计执行次数取最内层代码块"""
+        source = "function f(x) {\n  if (x) {\n    return 1;\n  }\n\n  return 2;\n}\nf(0);\n"
+        block = source.index("{\n    return")
+        script = pyv8.ScriptCoverage('1', 'f.js', source, [
+            {'functionName': '',
+             'ranges': [{'startOffset': 0, 'endOffset': len(source), 'count': 1}]},
+            {'functionName': 'f', 'ranges': [
+                {'startOffset': 0, 'endOffset': source.index("\nf(0)"), 'count': 1},
+                {'startOffset': block, 'endOffset': source.index("}\n\n") + 1, 'count': 0},
+            ]},
+        ])
+        self.assertEqual(script.line_counts(), {1: 1, 2: 1, 3: 0, 4: 0, 6: 1, 7: 1, 8: 1})
+        self.assertIs(script.line_counts(), script.line_counts())
+
+    def test_coverage_lcov_names(self):
+        """测试lcov中匿名函数和重名函数的名称唯一，没执行的分支记为0"""
+        source = "var a = function () {};\nvar b = function () { if (0) {} };\n"
+        second = source.index("function () { if")
+        block = source.index("{}", second)
+        script = pyv8.ScriptCoverage('1', 'anon.js', source, [
+            {'functionName': '',
+             'ranges': [{'startOffset': 0, 'endOffset': len(source), 'count': 1}]},
+            {'functionName': '',
+             'ranges': [{'startOffset': 8, 'endOffset': 22, 'count': 0}]},
+            {'functionName': '', 'ranges': [
+                {'startOffset': second, 'endOffset': len(source) - 2, 'count': 2},
+                {'startOffset': block, 'endOffset': block + 2, 'count': 0},
+            ]},
+        ])
+        self.assertEqual(script.function_names(),
+                         ['(anonymous)@1:1', '(anonymous)@1:9', f'(anonymous)@2:{second - 24 + 1}'])
+        lcov = script.to_lcov()
+        self.assertIn("FNDA:0,(anonymous)@1:9", lcov)
+        self.assertIn(f"FNDA:2,(anonymous)@2:{second - 24 + 1}", lcov)
+        self.assertIn("BRDA:2,2,0,0", lcov)
+        self.assertIn("BRF:1\nBRH:0", lcov)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import io
+import json
+import unittest
+import pyv8
+from pyv8.tools import ConstructorConfig, set_hook_tracer, hook_filters, exposed_constructs
+
+
+class TestTrace(unittest.TestCase):
+    """测试hook事件的记录和过滤"""
+
+    def setUp(self):
+        self.hook_filters = dict(hook_filters)
+        self.exposed_constructs = dict(exposed_constructs)
+
+    def tearDown(self):
+        set_hook_tracer(None)
+        hook_filters.update(self.hook_filters)
+        # 测试中定义的类不能留在全局的exposed_constructs里
+        exposed_constructs.clear()
+        exposed_constructs.update(self.exposed_constructs)
+
+    def test_ring_buffer(self):
+        """测试环形缓冲区满时覆盖最旧的事件"""
+        tracer = pyv8.HookTracer(capacity=4)
+        for i in range(6):
+            tracer.record('get', 'Top', 'Window', f'name{i}', i)
+        self.assertEqual(len(tracer), 4)
+        self.assertEqual(tracer.dropped, 2)
+        events = tracer.drain()
+        self.assertEqual([e.name for e in events], ['name2', 'name3', 'name4', 'name5'])
+        self.assertEqual(events[0].value_type, 'int')
+        self.assertEqual(len(tracer), 0)
+
+    def test_sample_and_callback(self):
+        """测试采样和批量回调"""
+        batches = []
+        tracer = pyv8.HookTracer(capacity=16, sample=2, callback=batches.append, batch_size=2)
+        for i in range(10):
+            tracer.record('get', '', 'Window', 'x', i)
+        self.assertEqual([len(b) for b in batches], [2, 2])
+        tracer.flush()
+        self.assertEqual([len(b) for b in batches], [2, 2, 1])
+
+    def test_jsonl(self):
+        """测试导出JSONL"""
+        tracer = pyv8.HookTracer()
+        tracer.record('set', 'Top', 'Window', 'a', 'b')
+        f = io.StringIO()
+        self.assertEqual(tracer.drain_to_jsonl(f), 1)
+        event = json.loads(f.getvalue())
+        self.assertEqual(event['op'], 'set')
+        self.assertEqual(event['value_type'], 'str')
+
+    def test_filter(self):
+        """测试过滤器"""
+        flt = pyv8.HookFilter(exclude={'Math'}, exclude_prefix=('a1_0x',),
+                              exclude_classes={'Console'})
+        self.assertFalse(flt.match('Window', 'Math'))
+        self.assertFalse(flt.match('Window', 'a1_0x1234'))
+        self.assertFalse(flt.match('Console', 'log'))
+        self.assertTrue(flt.match('Window', 'navigator'))
+
+        flt = pyv8.HookFilter(include_prefix=('on',), classes={'Window'})
+        self.assertTrue(flt.match('Window', 'onload'))
+        self.assertFalse(flt.match('Window', 'navigator'))
+        self.assertFalse(flt.match('Document', 'onload'))
+
+    def test_hook_tracer(self):
+        """测试默认hook把事件记录到tracer中"""
+        @ConstructorConfig()
+        class Window:
+            __v8_global_this__ = True
+
+        tracer = pyv8.HookTracer()
+        set_hook_tracer(tracer)
+        context = pyv8.Context(Window(), hook=True)
+        context.exec_js("faker.hook=true; a = 1; a; Math; Boolean = 1;")
+        events = tracer.drain()
+        self.assertIn('a', {e.name for e in events})
+        self.assertNotIn(('get', 'Math'), {(e.op, e.name) for e in events})
+        # 默认的排除列表只作用于getter
+        self.assertIn(('set', 'Boolean'), {(e.op, e.name) for e in events})
+
+    def test_hook_tracer_error(self):
+        """测试getter/setter出错时记录error事件"""
+        @ConstructorConfig()
+        class Window:
+            __v8_global_this__ = True
+
+        tracer = pyv8.HookTracer()
+        set_hook_tracer(tracer)
+        window = Window()
+        window.__v8_get_hook__('a', None, 'boom', 'Top')
+        window.__v8_set_hook__('b', 1, None, 'Top')
+        window.__v8_set_hook__('c', 1, 'boom', 'Top')
+        events = tracer.drain()
+        self.assertEqual([(e.op, e.name) for e in events],
+                         [('error', 'a'), ('set', 'b'), ('error', 'c')])
+        self.assertEqual(events[0].value_type, 'str')
+
+    def test_class_hook_filter(self):
+        """测试ConstructorConfig上注册的过滤器"""
+        @ConstructorConfig(hook_filter=pyv8.HookFilter(include={'b'}))
+        class Window:
+            __v8_global_this__ = True
+
+        self.assertIsInstance(Window._pyv8_hook_filter, pyv8.HookFilter)
+        tracer = pyv8.HookTracer()
+        set_hook_tracer(tracer)
+        context = pyv8.Context(Window(), hook=True)
+        context.exec_js("faker.hook=true; a = 1; b = 2; a; b;")
+        self.assertEqual({e.name for e in tracer.drain()}, {'b'})
+
+    def test_construct_hook_filter(self):
+        """测试构造函数hook使用类上注册的过滤器"""
+        @ConstructorConfig(hook_filter=pyv8.HookFilter(exclude_classes={'TraceQuiet'}))
+        class TraceQuiet:
+            pass
+
+        @ConstructorConfig()
+        class TraceLoud:
+            pass
+
+        # 不暴露的类和同名的类使用各自的过滤器
+        @ConstructorConfig(exposed=pyv8.FlagExposed.kNo,
+                           hook_filter=pyv8.HookFilter(exclude_classes={'TraceHidden'}))
+        class TraceHidden:
+            pass
+
+        other_quiet = ConstructorConfig()(type('TraceQuiet', (), {}))
+
+        tracer = pyv8.HookTracer()
+        set_hook_tracer(tracer)
+        TraceHidden.__v8_construct_hook__('TraceHidden', (), None, False, True, 'Top')
+        TraceQuiet.__v8_construct_hook__('TraceQuiet', (), None, False, True, 'Top')
+        TraceLoud.__v8_construct_hook__('TraceLoud', (), None, False, True, 'Top')
+        TraceLoud.__v8_construct_hook__('TraceLoud', (), 'boom', True, True, 'Top')
+        other_quiet.__v8_construct_hook__('TraceQuiet', (), None, False, False, 'Top')
+        self.assertEqual([(e.op, e.cls) for e in tracer.drain()],
+                         [('new', 'TraceLoud'), ('error', 'TraceLoud'), ('call', 'TraceQuiet')])
+
+
+if __name__ == "__main__":
+    unittest.main()